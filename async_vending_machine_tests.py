@@ -0,0 +1,81 @@
+"""
+    Tests for vending_machine.async_vending_machine.
+"""
+
+import asyncio
+import unittest
+import vending_machine as vm
+from vending_machine.async_vending_machine import AsyncFleet, AsyncVendingMachine
+
+class AsyncVendingMachineTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.machine = AsyncVendingMachine()
+        self.machine.machine.product_inventory[vm.COLA] = 2
+        self.machine.machine.coin_inventory[vm.NICKEL] = 4
+
+    async def test_purchase(self):
+        for _ in range(4):
+            await self.machine.insert_coin(vm.QUARTER)
+
+        self.assertTrue(await self.machine.select_cola())
+        self.assertEqual("THANK YOU", await self.machine.display())
+        self.assertEqual("INSERT COIN", await self.machine.display())
+
+    async def test_select_slot(self):
+        await self.machine.insert_coins(bytes([3, 3, 3, 3]))
+
+        self.assertTrue(await self.machine.select("A1"))
+        self.assertEqual(vm.COLA, self.machine.machine.product_dispense_bin)
+
+    async def test_concurrent_inserts_are_serialized(self):
+        await asyncio.gather(*(self.machine.insert_coin(vm.NICKEL) for _ in range(100)))
+
+        self.assertEqual(500, self.machine.machine.current_amount)
+        self.assertEqual(100, self.machine.machine.inserted_coins[vm.NICKEL])
+
+    async def test_subscriber_receives_display_changes(self):
+        queue = self.machine.subscribe()
+
+        await self.machine.insert_coin(vm.QUARTER)
+        await self.machine.insert_coin(vm.PENNY)
+        await self.machine.return_inserted_coins()
+
+        messages = []
+        while not queue.empty():
+            messages.append(queue.get_nowait())
+        self.assertEqual(["INSERT COIN", "$0.25", "INSERT COIN"], messages)
+
+    async def test_full_subscriber_keeps_latest_messages(self):
+        queue = self.machine.subscribe(maxsize=1)
+
+        await self.machine.insert_coin(vm.DIME)
+        await self.machine.insert_coin(vm.DIME)
+
+        self.assertEqual("$0.20", queue.get_nowait())
+
+    async def test_display_changes(self):
+        changes = self.machine.display_changes()
+
+        self.assertEqual("INSERT COIN", await changes.__anext__())
+        await self.machine.insert_coin(vm.DIME)
+        self.assertEqual("$0.10", await changes.__anext__())
+
+        await changes.aclose()
+        self.assertEqual([], self.machine.subscribers)
+
+class AsyncFleetTest(unittest.IsolatedAsyncioTestCase):
+    async def test_run_operations_on_many_machines(self):
+        fleet = AsyncFleet()
+        for machine_id in range(50):
+            fleet.add(machine_id).machine.product_inventory[vm.CHIPS] = 1
+
+        await fleet.run((machine_id, "insert_coin", (vm.QUARTER,))
+                        for machine_id in range(50) for _ in range(2))
+        results = await fleet.run((machine_id, "select_chips", ()) for machine_id in range(50))
+
+        self.assertEqual(50, len(fleet))
+        self.assertEqual([True] * 50, results)
+        self.assertEqual(vm.CHIPS, fleet[7].machine.product_dispense_bin)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+    Tests for vending_machine.catalog.
+"""
+
+import io
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.catalog import Catalog, CatalogEntry, parse_price, reprice
+
+CATALOG_CSV = """slot,product,price,stock
+A1,COLA,1.00,3
+A2,WATER,$0.85,2
+B1,GUM,.35,0
+B2,COLA,1.00,1
+"""
+
+class CatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.catalog = Catalog.from_csv(io.StringIO(CATALOG_CSV))
+        self.machine = VendingMachine(catalog=self.catalog)
+        self.machine.coin_inventory[vm.NICKEL] = 4
+
+    def insert(self, *coins):
+        for coin in coins:
+            self.machine.insert_coin(coin)
+
+    def test_parse_price(self):
+        self.assertEqual(100, parse_price("1.00"))
+        self.assertEqual(85, parse_price("$0.85"))
+        self.assertEqual(35, parse_price(".35"))
+        self.assertEqual(120, parse_price("1.2"))
+        self.assertEqual(2, parse_price("0.02"))
+        with self.assertRaises(ValueError):
+            parse_price("1.005")
+
+    def test_load_catalog(self):
+        self.assertEqual(4, len(self.catalog))
+        self.assertEqual(CatalogEntry("A2", "WATER", 85, 2), list(self.catalog)[1])
+        self.assertEqual(vm.COLA, self.catalog.product("B2"))
+        self.assertEqual({vm.COLA : 4, "WATER" : 2, "GUM" : 0}, self.catalog.stock)
+
+    def test_catalog_with_two_prices_for_product_should_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            Catalog([("A1", vm.COLA, 100, 1), ("A2", vm.COLA, 90, 1)])
+
+    def test_machine_is_stocked_from_catalog(self):
+        self.assertEqual({vm.COLA : 4, "WATER" : 2, "GUM" : 0}, self.machine.product_inventory)
+
+    def test_select_slot(self):
+        self.insert(vm.QUARTER, vm.QUARTER, vm.QUARTER, vm.DIME)
+
+        self.assertTrue(self.machine.select("A2"))
+        self.assertEqual("WATER", self.machine.product_dispense_bin)
+        self.assertEqual(1, self.machine.product_inventory["WATER"])
+
+    def test_select_slot_without_enough_money(self):
+        self.assertFalse(self.machine.select("B2"))
+        self.assertEqual("PRICE $1.00", self.machine.display)
+
+    def test_select_unknown_slot_should_raise_key_error(self):
+        with self.assertRaises(KeyError):
+            self.machine.select("Z9")
+
+    def test_select_default_slots(self):
+        machine = VendingMachine()
+        machine.product_inventory[vm.CHIPS] = 1
+        machine.insert_coin(vm.QUARTER)
+        machine.insert_coin(vm.QUARTER)
+
+        self.assertTrue(machine.select("A2"))
+        self.assertEqual(vm.CHIPS, machine.product_dispense_bin)
+
+    def test_price_change_applies_to_machines_using_catalog(self):
+        other = VendingMachine(catalog=self.catalog)
+        self.catalog.set_prices({"WATER" : 75})
+
+        self.insert(vm.QUARTER, vm.QUARTER, vm.QUARTER)
+        self.assertTrue(self.machine.select("A2"))
+        self.assertEqual(75, other.prices["WATER"])
+
+    def test_set_prices_with_unknown_product_should_raise_key_error(self):
+        with self.assertRaises(KeyError):
+            self.catalog.set_prices({"SODA" : 100})
+
+    def test_reprice_many_catalogs(self):
+        other = Catalog([("C1", "GUM", 35, 5)])
+        reprice([self.catalog, other], {"GUM" : 40, "WATER" : 90})
+
+        self.assertEqual(40, self.catalog.prices["GUM"])
+        self.assertEqual(90, self.catalog.prices["WATER"])
+        self.assertEqual({"GUM" : 40}, other.prices)
+
+    def test_select_product_added_after_machine_was_built_should_raise_key_error(self):
+        self.catalog.add("C1", "SODA", 50, 4)
+        self.insert(vm.QUARTER, vm.QUARTER)
+
+        with self.assertRaises(KeyError):
+            self.machine.select("C1")
+
+        self.assertEqual(2, self.machine.inserted_coins[vm.QUARTER])
+        self.assertEqual(0, self.machine.coin_inventory[vm.QUARTER])
+        self.assertEqual(50, self.machine.current_amount)
+        self.assertEqual("", self.machine.product_dispense_bin)
+
+    def test_machines_sharing_catalog_share_layout(self):
+        self.assertIs(self.machine.layout, VendingMachine(catalog=self.catalog).layout)
+
+if __name__ == '__main__':
+    unittest.main()
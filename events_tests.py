@@ -0,0 +1,120 @@
+"""
+    Tests for vending_machine.events.
+"""
+
+import threading
+import unittest
+from queue import Empty
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.events import (BACK_IN_STOCK, BLOCK, COIN_REJECTED, DROP_NEWEST,
+                                    DROP_OLDEST, EXACT_CHANGE_ENTERED, EXACT_CHANGE_LEFT,
+                                    PRODUCT_DISPENSED, SOLD_OUT, Event, EventFeed, Subscription)
+from vending_machine_test_support import buy_candy
+
+class EventFeedTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.machine.coin_inventory[vm.NICKEL] = 4
+        self.machine.product_inventory[vm.CANDY] = 1
+        self.feed = EventFeed()
+        self.feed.attach(self.machine, "M1")
+        self.subscription = self.feed.subscribe()
+
+    def test_accepted_coins_are_not_published(self):
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.return_inserted_coins()
+
+        self.assertEqual([], self.subscription.drain())
+
+    def test_rejected_coin(self):
+        self.machine.insert_coin(vm.PENNY)
+
+        self.assertEqual([Event("M1", COIN_REJECTED, vm.PENNY, 1)], self.subscription.drain())
+
+    def test_buying_last_product_and_change_running_low(self):
+        buy_candy(self.machine)
+
+        self.assertEqual([Event("M1", PRODUCT_DISPENSED, vm.CANDY, 1),
+                          Event("M1", SOLD_OUT, vm.CANDY, 0),
+                          Event("M1", EXACT_CHANGE_ENTERED, None, 0)],
+                         self.subscription.drain())
+
+    def test_restock_and_refill(self):
+        buy_candy(self.machine)
+        self.subscription.drain()
+
+        self.machine.restock({vm.CANDY : 2, vm.COLA : 1})
+        self.machine.restock({vm.CANDY : 1})
+        self.machine.refill_coins({vm.NICKEL : 2})
+
+        self.assertEqual([Event("M1", BACK_IN_STOCK, vm.CANDY, 2),
+                          Event("M1", BACK_IN_STOCK, vm.COLA, 1),
+                          Event("M1", EXACT_CHANGE_LEFT, None, 0)],
+                         self.subscription.drain())
+
+    def test_detached_machine_is_not_published(self):
+        self.feed.detach("M1")
+        self.machine.insert_coin(vm.PENNY)
+
+        self.assertEqual([], self.subscription.drain())
+        self.assertEqual((), self.machine.observers)
+
+    def test_unsubscribed_subscription_receives_nothing(self):
+        self.feed.unsubscribe(self.subscription)
+        self.machine.insert_coin(vm.PENNY)
+
+        self.assertEqual(0, len(self.subscription))
+
+class SubscriptionTest(unittest.TestCase):
+    def test_drop_oldest(self):
+        subscription = Subscription(2, DROP_OLDEST)
+        for event in range(5):
+            subscription.put(event)
+
+        self.assertEqual([3, 4], subscription.drain())
+        self.assertEqual(3, subscription.dropped)
+
+    def test_drop_newest(self):
+        subscription = Subscription(2, DROP_NEWEST)
+        for event in range(5):
+            subscription.put(event)
+
+        self.assertEqual([0, 1], subscription.drain())
+        self.assertEqual(3, subscription.dropped)
+
+    def test_block_waits_for_reader(self):
+        subscription = Subscription(1, BLOCK)
+        received = []
+
+        def read():
+            for _ in range(50):
+                received.append(subscription.get(timeout=5))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for event in range(50):
+            subscription.put(event)
+        reader.join()
+
+        self.assertEqual(list(range(50)), received)
+        self.assertEqual(0, subscription.dropped)
+
+    def test_block_drops_new_event_after_timeout(self):
+        subscription = Subscription(1, BLOCK, timeout=0.01)
+        subscription.put(1)
+        subscription.put(2)
+
+        self.assertEqual([1], subscription.drain())
+        self.assertEqual(1, subscription.dropped)
+
+    def test_get_from_empty_subscription_should_raise_empty(self):
+        with self.assertRaises(Empty):
+            Subscription().get(block=False)
+
+    def test_unknown_overflow_policy_should_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            Subscription(overflow="DROP_ALL")
+
+if __name__ == '__main__':
+    unittest.main()
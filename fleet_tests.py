@@ -0,0 +1,141 @@
+"""
+    Tests for vending_machine.fleet.
+"""
+
+import random
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.fleet import Fleet
+
+def machine_state(machine):
+    """Return the state of a vending machine for comparison."""
+    return (dict(machine.coin_inventory),
+            dict(machine.inserted_coins),
+            dict(machine.coin_return),
+            dict(machine.product_inventory),
+            machine.current_amount,
+            machine.product_dispense_bin,
+            machine.display)
+
+class FleetTest(unittest.TestCase):
+    def setUp(self):
+        self.fleet = Fleet(3)
+
+    def test_new_fleet_is_empty(self):
+        self.assertEqual(3, self.fleet.size)
+        self.assertEqual([0, 0, 0], list(self.fleet.current_amount))
+        self.assertEqual([0, 0, 0], list(self.fleet.coin_inventory[vm.QUARTER]))
+        self.assertEqual([0, 0, 0], list(self.fleet.product_inventory[vm.COLA]))
+
+    def test_insert_coin_into_batch(self):
+        self.fleet.insert_coin(vm.QUARTER, [0, 2])
+        self.assertEqual([25, 0, 25], list(self.fleet.current_amount))
+        self.assertEqual([1, 0, 1], list(self.fleet.inserted_coins[vm.QUARTER]))
+
+    def test_insert_coin_with_penny_should_be_placed_in_coin_return(self):
+        self.fleet.insert_coin(vm.PENNY)
+        self.assertEqual([1, 1, 1], list(self.fleet.coin_return[vm.PENNY]))
+        self.assertEqual([0, 0, 0], list(self.fleet.current_amount))
+
+    def test_dispense_product_only_from_machines_with_enough_money(self):
+        self.fleet.insert_coin(vm.QUARTER)
+        self.fleet.insert_coin(vm.QUARTER, [1])
+
+        self.fleet.dispense_product(vm.CHIPS)
+
+        self.assertEqual(["", vm.CHIPS, ""], self.fleet.product_dispense_bin)
+        self.assertEqual([0, 2, 0], list(self.fleet.coin_inventory[vm.QUARTER]))
+        self.assertEqual([25, 0, 25], list(self.fleet.current_amount))
+        self.assertEqual(["PRICE $0.50", "THANK YOU", "PRICE $0.50"], self.fleet.messages)
+
+    def test_return_inserted_coins_from_batch(self):
+        self.fleet.insert_coin(vm.DIME)
+        self.fleet.return_inserted_coins([1])
+
+        self.assertEqual([10, 0, 10], list(self.fleet.current_amount))
+        self.assertEqual([0, 1, 0], list(self.fleet.coin_return[vm.DIME]))
+
+    def test_restock_batch(self):
+        self.fleet.restock({vm.COLA : [1, 2], vm.CANDY : 3}, [0, 2])
+
+        self.assertEqual([1, 0, 2], list(self.fleet.product_inventory[vm.COLA]))
+        self.assertEqual([3, 0, 3], list(self.fleet.product_inventory[vm.CANDY]))
+        self.assertEqual({vm.COLA : 3, vm.CHIPS : 0, vm.CANDY : 6}, self.fleet.product_totals)
+
+    def test_restock_with_wrong_number_of_quantities_should_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            self.fleet.restock({vm.COLA : [1, 2]})
+
+    def test_refill_coins_leaves_exact_change_mode(self):
+        self.assertEqual(3, self.fleet.exact_change_count)
+
+        self.fleet.refill_coins({vm.NICKEL : [4, 1, 4], vm.DIME : 1})
+
+        self.assertEqual(bytearray([0, 1, 0]), self.fleet.exact_change)
+        self.assertEqual(1, self.fleet.exact_change_count)
+        self.assertEqual({vm.NICKEL : 9, vm.DIME : 3, vm.QUARTER : 0}, self.fleet.coin_totals)
+
+    def test_machine_round_trip(self):
+        machine = VendingMachine()
+        machine.coin_inventory[vm.NICKEL] = 4
+        machine.product_inventory[vm.CANDY] = 2
+        machine.insert_coin(vm.PENNY)
+        machine.insert_coin(vm.DIME)
+
+        fleet = Fleet.from_machines([machine])
+
+        self.assertEqual(machine_state(machine), machine_state(fleet.machine(0)))
+
+    def test_random_operations_match_vending_machine(self):
+        rng = random.Random(1234)
+        machines = [VendingMachine() for _ in range(20)]
+        for machine in machines:
+            machine.coin_inventory[vm.NICKEL] = rng.randint(0, 5)
+            machine.product_inventory[vm.COLA] = rng.randint(0, 5)
+            machine.product_inventory[vm.CANDY] = rng.randint(0, 5)
+        fleet = Fleet.from_machines(machines)
+
+        coins = [vm.PENNY, vm.NICKEL, vm.DIME, vm.QUARTER]
+        for _ in range(200):
+            batch = rng.sample(range(len(machines)), rng.randint(1, len(machines)))
+            operation = rng.random()
+            if operation < 0.7:
+                coin = rng.choice(coins)
+                fleet.insert_coin(coin, batch)
+                for index in batch:
+                    machines[index].insert_coin(coin)
+            elif operation < 0.75:
+                quantities = [rng.randint(0, 2) for _ in batch]
+                fleet.refill_coins({vm.NICKEL : quantities}, batch)
+                for index, quantity in zip(batch, quantities):
+                    machines[index].refill_coins({vm.NICKEL : quantity})
+            elif operation < 0.8:
+                fleet.restock({vm.CHIPS : 1}, batch)
+                for index in batch:
+                    machines[index].restock({vm.CHIPS : 1})
+            elif operation < 0.9:
+                product = rng.choice(list(VendingMachine.PRODUCTS))
+                fleet.dispense_product(product, batch)
+                for index in batch:
+                    machines[index].dispense_product(product)
+            else:
+                fleet.return_inserted_coins(batch)
+                for index in batch:
+                    machines[index].return_inserted_coins()
+
+        for index, machine in enumerate(machines):
+            self.assertEqual(machine_state(machine), machine_state(fleet.machine(index)))
+            self.assertEqual(machine.exact_change_only(), fleet.exact_change[index])
+
+        for coin in VendingMachine.VALID_COINS:
+            self.assertEqual(sum(machine.coin_inventory[coin] for machine in machines),
+                             fleet.coin_totals[coin])
+        for product in VendingMachine.PRODUCTS:
+            self.assertEqual(sum(machine.product_inventory[product] for machine in machines),
+                             fleet.product_totals[product])
+        self.assertEqual(sum(machine.exact_change_only() for machine in machines),
+                         fleet.exact_change_count)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+    Tests for vending_machine.forecast.
+"""
+
+import random
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.forecast import (Demand, Forecast, MachineState, customers, forecast,
+                                      forecast_fleet, machine_state, shortage_probability,
+                                      shortage_quantile, simulate)
+
+DEMAND = Demand(10, {vm.COLA : 2, vm.CHIPS : 3, vm.CANDY : 5},
+                {vm.NICKEL : 1, vm.DIME : 2, vm.QUARTER : 7})
+
+def step_machine(machine, demand, horizon, rng):
+    """Return the hours until the vending machine needs exact change, stepping it coin by coin."""
+    if machine.exact_change_only():
+        return 0.0
+
+    for time, product, paid in customers(demand, machine.prices, machine.VALID_COINS, rng):
+        if time > horizon or machine.is_machine_sold_out():
+            return None
+        if machine.product_inventory[product] <= 0:
+            continue
+
+        for coin in paid:
+            machine.insert_coin(coin)
+        machine.dispense_product(product)
+        machine.make_change(machine.current_amount)
+        machine.current_amount = 0
+
+        if machine.exact_change_only():
+            return time
+
+class ForecastTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.machine.coin_inventory[vm.NICKEL] = 6
+        self.machine.coin_inventory[vm.DIME] = 3
+        for product in VendingMachine.PRODUCTS:
+            self.machine.product_inventory[product] = 10
+        self.state = machine_state("M1", self.machine)
+
+    def test_simulation_matches_vending_machine(self):
+        for seed in range(20):
+            machine = VendingMachine()
+            for coin, quantity in self.state.coin_inventory.items():
+                machine.coin_inventory[coin] = quantity
+            for product, quantity in self.state.product_inventory.items():
+                machine.product_inventory[product] = quantity
+
+            expected = step_machine(machine, DEMAND, 24.0, random.Random(seed))
+            self.assertEqual(expected, simulate(self.state, DEMAND, 24.0, random.Random(seed)))
+
+    def test_change_running_low_after_first_sale(self):
+        state = MachineState("M2", {vm.NICKEL : 4}, {vm.CANDY : 5})
+        result = forecast(state, Demand(1, {vm.CANDY : 1}, {vm.QUARTER : 1}), runs=10)
+
+        self.assertEqual(10, len(result.times))
+        self.assertTrue(all(time > 0 for time in result.times))
+
+    def test_machine_already_needing_exact_change(self):
+        state = MachineState("M3", {}, {vm.COLA : 1})
+        result = forecast(state, DEMAND, runs=5)
+
+        self.assertEqual([0.0] * 5, result.times)
+
+    def test_sold_out_machine_never_runs_short(self):
+        state = MachineState("M4", {vm.NICKEL : 4}, {})
+        self.assertEqual([], forecast(state, DEMAND, runs=5).times)
+
+    def test_parallel_forecast_matches_serial_forecast(self):
+        states = [MachineState("M%d" % index, {vm.NICKEL : index % 6, vm.DIME : 3},
+                               {vm.CANDY : 5, vm.CHIPS : 5})
+                  for index in range(10)]
+
+        serial = forecast_fleet(states, DEMAND, runs=20, processes=1)
+        parallel = forecast_fleet(states, DEMAND, runs=20, processes=2, shard_size=3)
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(["M%d" % index for index in range(10)],
+                         [result.machine_id for result in parallel])
+
+    def test_demand_for_each_machine(self):
+        states = [MachineState("M1", {vm.NICKEL : 4}, {vm.CANDY : 5}),
+                  MachineState("M2", {vm.NICKEL : 4}, {vm.CHIPS : 5})]
+        demand = {"M1" : Demand(1, {vm.CANDY : 1}, {vm.QUARTER : 1}),
+                  "M2" : Demand(1, {vm.CHIPS : 1}, {vm.QUARTER : 1})}
+
+        results = forecast_fleet(states, demand, runs=5, processes=1)
+
+        self.assertEqual(5, len(results[0].times))
+        self.assertEqual([], results[1].times)
+
+    def test_shortage_statistics(self):
+        result = Forecast("M1", [1.0, 2.0, 3.0, 8.0], 8, 24.0)
+
+        self.assertEqual(0.5, shortage_probability(result))
+        self.assertEqual(0.375, shortage_probability(result, 3.0))
+        self.assertEqual(2.0, shortage_quantile(result, 0.25))
+        self.assertEqual(8.0, shortage_quantile(result, 0.5))
+        self.assertIsNone(shortage_quantile(result, 0.75))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+    Tests for vending_machine.journal.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.journal import Journal, RECORD, recover
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "machine.journal")
+
+        self.machine = VendingMachine()
+        self.machine.coin_inventory[vm.NICKEL] = 4
+        self.machine.product_inventory[vm.COLA] = 3
+        self.machine.product_inventory[vm.CANDY] = 2
+
+        self.journal = Journal(self.path, snapshot_interval=5)
+        self.journal.attach(self.machine)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def buy_candy(self):
+        list(self.machine.process_transactions(
+            [vm.Session([vm.QUARTER, vm.QUARTER, vm.QUARTER, vm.PENNY], vm.CANDY)]))
+
+    def assert_recovered(self):
+        self.journal.flush()
+        recovered = recover(self.path)
+
+        self.assertEqual(self.machine.coin_inventory, recovered.coin_inventory)
+        self.assertEqual(self.machine.inserted_coins, recovered.inserted_coins)
+        self.assertEqual(self.machine.product_inventory, recovered.product_inventory)
+        self.assertEqual(self.machine.current_amount, recovered.current_amount)
+
+    def test_recover_from_snapshot_only(self):
+        self.assert_recovered()
+
+    def test_recover_after_purchase(self):
+        self.buy_candy()
+        self.assert_recovered()
+
+    def test_recover_with_inserted_coins(self):
+        self.buy_candy()
+        self.machine.insert_coin(vm.DIME)
+        self.assert_recovered()
+
+    def test_recover_after_returning_inserted_coins(self):
+        self.machine.insert_coin(vm.DIME)
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.return_inserted_coins()
+        self.assert_recovered()
+
+    def test_recover_after_restocking(self):
+        self.machine.restock({vm.CHIPS : 5})
+        self.machine.refill_coins({vm.DIME : 2})
+        self.assert_recovered()
+
+    def test_recover_after_inserting_batch_of_coins(self):
+        self.journal.snapshot_interval = 2
+        self.machine.insert_coin(vm.NICKEL)
+        self.machine.insert_coins(bytes([3, 3, 2]))
+        self.assert_recovered()
+
+    def test_recover_replays_only_records_after_snapshot(self):
+        self.buy_candy()
+        self.buy_candy()
+        self.journal.flush()
+
+        with open(self.path + ".snapshot", "rb") as snapshot_file:
+            snapshot_file.seek(4)
+            position = int.from_bytes(snapshot_file.read(8), "little")
+
+        self.assertGreater(position, 0)
+        self.assertLess(os.path.getsize(self.path) - position, 5 * RECORD.size)
+        self.assert_recovered()
+
+    def test_recover_ignores_partly_written_record(self):
+        self.buy_candy()
+        self.journal.flush()
+        with open(self.path, "ab") as journal_file:
+            journal_file.write(b"\x01\x00")
+
+        self.assert_recovered()
+
+class JournalCrashTest(unittest.TestCase):
+    # Script run in a new process: journals purchases of cola and then
+    # exits at once without flushing or closing anything.
+    CRASH_SCRIPT = """
+import os, sys
+import vending_machine as vm
+from vending_machine.journal import Journal
+machine = vm.VendingMachine()
+machine.product_inventory[vm.COLA] = 500
+Journal(sys.argv[1], sync=sys.argv[2] == "sync").attach(machine)
+for _ in range(100):
+    for _ in range(4):
+        machine.insert_coin(vm.QUARTER)
+    machine.select_cola()
+os._exit(1)
+"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "machine.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_recovered_after_crash(self, sync):
+        process = subprocess.run([sys.executable, "-c", self.CRASH_SCRIPT, self.path, sync],
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(1, process.returncode)
+
+        recovered = recover(self.path)
+
+        self.assertEqual(400, recovered.product_inventory[vm.COLA])
+        self.assertEqual(400, recovered.coin_inventory[vm.QUARTER])
+        self.assertEqual(0, recovered.current_amount)
+
+    def test_recover_after_crash(self):
+        self.assert_recovered_after_crash("")
+
+    def test_recover_after_crash_with_sync(self):
+        self.assert_recovered_after_crash("sync")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+    Tests for vending_machine.ledger.
+"""
+
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.ledger import Rollup, SalesLedger
+from vending_machine_test_support import FakeClock, buy, buy_candy, stocked_machine
+
+# Stock of every product in the machines bought from.
+STOCK = dict.fromkeys(VendingMachine.PRODUCTS, 100)
+
+class SalesLedgerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.ledger = SalesLedger(bucket_seconds=3600, buckets=3, clock=self.clock)
+        self.machine = stocked_machine(100, STOCK)
+        self.ledger.attach(self.machine)
+
+    def test_sales_and_change_are_rolled_up(self):
+        buy_candy(self.machine)
+        buy_candy(self.machine)
+        buy(self.machine, vm.CHIPS, [vm.QUARTER, vm.QUARTER])
+
+        self.assertEqual([(0, Rollup({vm.CANDY : 2, vm.CHIPS : 1}, {vm.CANDY : 130, vm.CHIPS : 50},
+                                     {vm.NICKEL : 4}, 20))],
+                         self.ledger.buckets())
+
+    def test_sales_go_to_bucket_of_their_hour(self):
+        buy_candy(self.machine)
+        self.clock.now = 3600 * 2 + 10
+        buy_candy(self.machine)
+        buy_candy(self.machine)
+
+        buckets = self.ledger.buckets()
+        self.assertEqual([0, 7200], [start for start, _ in buckets])
+        self.assertEqual({vm.CANDY : 2}, buckets[1][1].sales)
+        self.assertEqual({vm.CANDY : 195}, self.ledger.rollup().revenue)
+        self.assertEqual({vm.CANDY : 130}, self.ledger.rollup(start=3600).revenue)
+        self.assertEqual({vm.CANDY : 65}, self.ledger.rollup(end=3600).revenue)
+
+    def test_old_buckets_are_dropped(self):
+        for hour in range(10):
+            self.clock.now = hour * 3600
+            buy_candy(self.machine)
+
+        self.assertEqual([7 * 3600, 8 * 3600, 9 * 3600],
+                         [start for start, _ in self.ledger.buckets()])
+        self.assertEqual(3, len(self.ledger.ring))
+        self.assertEqual({vm.CANDY : 3}, self.ledger.rollup().sales)
+
+    def test_bucket_left_behind_is_not_reported(self):
+        buy_candy(self.machine)
+        self.clock.now = 3600 * 4
+        buy_candy(self.machine)
+
+        self.assertEqual([4 * 3600], [start for start, _ in self.ledger.buckets()])
+
+    def test_detached_machine_is_not_recorded(self):
+        self.ledger.detach(self.machine)
+        buy_candy(self.machine)
+
+        self.assertEqual([], self.ledger.buckets())
+
+    def test_merge_fleet_ledgers(self):
+        other_machine = stocked_machine(100, STOCK)
+        other = SalesLedger(bucket_seconds=3600, buckets=3, clock=self.clock)
+        other.attach(other_machine)
+
+        buy_candy(self.machine)
+        buy(other_machine, vm.COLA, [vm.QUARTER] * 4)
+        self.clock.now = 3600
+        buy(other_machine, vm.CANDY, [vm.QUARTER] * 3)
+
+        merged = SalesLedger.merge([self.ledger, other])
+
+        self.assertEqual(Rollup({vm.CANDY : 1, vm.COLA : 1}, {vm.CANDY : 65, vm.COLA : 100},
+                                {vm.NICKEL : 2}, 10),
+                         merged.buckets()[0][1])
+        self.assertEqual({vm.CANDY : 2, vm.COLA : 1}, merged.rollup().sales)
+        self.assertEqual(20, merged.rollup().change_paid)
+
+    def test_merge_ledgers_with_different_widths_should_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            SalesLedger.merge([self.ledger, SalesLedger(bucket_seconds=60)])
+
+if __name__ == '__main__':
+    unittest.main()
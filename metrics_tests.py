@@ -0,0 +1,102 @@
+"""
+    Tests for vending_machine.metrics.
+"""
+
+import json
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.metrics import Metrics, instrument, uninstrument
+from vending_machine.thread_safe_vending_machine import ThreadSafeVendingMachine
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.machine.product_inventory[vm.CHIPS] = 2
+        self.machine.coin_inventory[vm.NICKEL] = 4
+        self.metrics = instrument(self.machine)
+
+    def test_machine_is_not_instrumented_by_default(self):
+        machine = VendingMachine()
+        self.assertIs(VendingMachine, type(machine))
+        self.assertIsNone(machine.metrics)
+
+    def test_instrumented_machine_is_a_vending_machine(self):
+        self.assertIsInstance(self.machine, VendingMachine)
+        self.assertEqual("INSERT COIN", self.machine.display)
+
+    def test_operations_are_counted(self):
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.insert_coin(vm.DIME)
+        self.machine.select_chips()
+        self.machine.return_change()
+        self.machine.display
+
+        self.assertEqual(3, self.metrics.count("insert_coin"))
+        self.assertEqual(1, self.metrics.count("dispense_product"))
+        self.assertEqual(1, self.metrics.count("make_change"))
+        self.assertEqual(1, self.metrics.count("display"))
+
+    def test_display_reads_count_exact_change_checks(self):
+        self.machine.display
+        self.machine.display
+
+        self.assertEqual(2, self.metrics.count("display"))
+        self.assertEqual(1, self.metrics.count("exact_change_only"))
+
+    def test_rejected_coins_are_counted(self):
+        self.machine.insert_coin(vm.PENNY)
+        self.machine.insert_coin(vm.PENNY)
+        self.machine.insert_coin(vm.NICKEL)
+
+        self.assertEqual({"coins_rejected" : 2}, self.metrics.counters)
+
+    def test_rejected_coins_in_batch_are_counted(self):
+        self.assertEqual(2, self.machine.insert_coins(bytes([0, 1, 0, 3])))
+
+        self.assertEqual(1, self.metrics.count("insert_coins"))
+        self.assertEqual({"coins_rejected" : 2}, self.metrics.counters)
+
+    def test_uninstrument(self):
+        uninstrument(self.machine)
+        self.machine.insert_coin(vm.NICKEL)
+
+        self.assertIs(VendingMachine, type(self.machine))
+        self.assertEqual(0, self.metrics.count("insert_coin"))
+
+    def test_instrument_subclass_with_shared_metrics(self):
+        machine = ThreadSafeVendingMachine()
+        instrument(machine, self.metrics)
+        machine.insert_coin(vm.DIME)
+        self.machine.insert_coin(vm.DIME)
+
+        self.assertIsInstance(machine, ThreadSafeVendingMachine)
+        self.assertEqual(2, self.metrics.count("insert_coin"))
+
+    def test_export_json(self):
+        self.machine.insert_coin(vm.DIME)
+        document = json.loads(self.metrics.export_json())
+
+        self.assertEqual(1, document["operations"]["insert_coin"]["count"])
+        self.assertEqual(1, sum(document["operations"]["insert_coin"]["histogram"]))
+
+    def test_export_prometheus(self):
+        metrics = Metrics(buckets=(1000, 2000))
+        metrics.observe("insert_coin", 500)
+        metrics.observe("insert_coin", 1500)
+        metrics.observe("insert_coin", 5000)
+        metrics.increment("coins_rejected")
+
+        self.assertEqual('# TYPE vending_machine_coins_rejected_total counter\n'
+                         'vending_machine_coins_rejected_total 1\n'
+                         '# TYPE vending_machine_operation_seconds histogram\n'
+                         'vending_machine_operation_seconds_bucket{operation="insert_coin",le="1e-06"} 1\n'
+                         'vending_machine_operation_seconds_bucket{operation="insert_coin",le="2e-06"} 2\n'
+                         'vending_machine_operation_seconds_bucket{operation="insert_coin",le="+Inf"} 3\n'
+                         'vending_machine_operation_seconds_sum{operation="insert_coin"} 0.000007000\n'
+                         'vending_machine_operation_seconds_count{operation="insert_coin"} 3\n',
+                         metrics.export_prometheus())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+    Tests for vending_machine.persistence.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.persistence import MachineRecord, MemoryBackend, Persistence, SQLiteBackend
+from vending_machine_test_support import FakeClock, buy_candy, stocked_machine
+
+class PersistenceTest(unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryBackend()
+        self.clock = FakeClock()
+        self.persistence = Persistence(self.backend, batch_size=10, interval=5.0, clock=self.clock)
+        self.machine = stocked_machine(4, {vm.CANDY : 3})
+        self.persistence.attach(self.machine, "M1")
+        self.persistence.flush()
+        self.writes = self.backend.writes
+
+    def test_inserting_coins_is_not_written(self):
+        for _ in range(100):
+            self.machine.insert_coin(vm.DIME)
+        self.machine.return_inserted_coins()
+
+        self.assertEqual(self.writes, self.backend.writes)
+        self.assertEqual(set(), self.persistence.dirty)
+
+    def test_events_are_written_in_batches(self):
+        for _ in range(25):
+            self.machine.restock({vm.CANDY : 1})
+
+        self.assertEqual(self.writes + 2, self.backend.writes)
+        self.assertEqual(5, self.persistence.pending)
+        self.assertEqual(23, self.backend.load("M1").product_inventory[vm.CANDY])
+
+    def test_interval_causes_write(self):
+        buy_candy(self.machine)
+        self.assertEqual(self.writes, self.backend.writes)
+
+        self.clock.now = 5.0
+        self.machine.refill_coins({vm.DIME : 1})
+
+        self.assertEqual(self.writes + 1, self.backend.writes)
+
+    def test_record_holds_inventories_and_sales(self):
+        buy_candy(self.machine)
+        self.persistence.flush()
+
+        self.assertEqual(MachineRecord({vm.NICKEL : 2, vm.DIME : 0, vm.QUARTER : 3},
+                                       {vm.COLA : 0, vm.CHIPS : 0, vm.CANDY : 2},
+                                       {vm.CANDY : 1}, 65),
+                         self.backend.load("M1"))
+
+    def test_attach_restores_machine(self):
+        buy_candy(self.machine)
+        self.persistence.detach("M1")
+
+        machine = VendingMachine()
+        self.persistence.attach(machine, "M1")
+
+        self.assertEqual(self.machine.coin_inventory, machine.coin_inventory)
+        self.assertEqual(self.machine.product_inventory, machine.product_inventory)
+        self.assertEqual(65, self.persistence.revenue["M1"])
+
+    def test_detached_machine_is_not_persisted(self):
+        self.persistence.detach("M1")
+        buy_candy(self.machine)
+
+        self.assertEqual((), self.machine.observers)
+        self.assertEqual(set(), self.persistence.dirty)
+
+class SQLiteBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "machines.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_state_survives_reopening(self):
+        persistence = Persistence(SQLiteBackend(self.path), batch_size=1000)
+        machines = [stocked_machine(4, {vm.CANDY : 3}) for _ in range(3)]
+        for index, machine in enumerate(machines):
+            persistence.attach(machine, "M%d" % index)
+        buy_candy(machines[1])
+        persistence.close()
+
+        backend = SQLiteBackend(self.path)
+        record = backend.load("M1")
+        backend.close()
+
+        self.assertEqual(dict(machines[1].coin_inventory), record.coin_inventory)
+        self.assertEqual(dict(machines[1].product_inventory), record.product_inventory)
+        self.assertEqual({vm.CANDY : 1}, record.sales)
+        self.assertEqual(65, record.revenue)
+
+    def test_load_unknown_machine(self):
+        backend = SQLiteBackend(":memory:")
+        self.assertIsNone(backend.load("M9"))
+        backend.close()
+
+if __name__ == '__main__':
+    unittest.main()
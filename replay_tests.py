@@ -0,0 +1,60 @@
+"""
+    Tests for vending_machine.replay.
+"""
+
+import random
+import unittest
+import vending_machine as vm
+from vending_machine.replay import MachineLog, merge, replay_log, replay_logs
+
+def random_log(machine_id, rng, sessions=50):
+    """Return a machine log of random customer sessions."""
+    coins = [vm.PENNY, vm.NICKEL, vm.DIME, vm.QUARTER]
+    products = [None] + list(vm.VendingMachine.PRODUCTS)
+    return MachineLog(machine_id,
+                      {vm.NICKEL : rng.randint(0, 10), vm.DIME : rng.randint(0, 10)},
+                      {product : rng.randint(0, 5) for product in vm.VendingMachine.PRODUCTS},
+                      [vm.Session([rng.choice(coins) for _ in range(rng.randint(0, 6))],
+                                  rng.choice(products),
+                                  rng.random() < 0.2)
+                       for _ in range(sessions)])
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.logs = [random_log("M%03d" % index, rng) for index in range(20)]
+
+    def test_replay_log(self):
+        log = MachineLog("M1", {vm.NICKEL : 4}, {vm.CANDY : 2},
+                         [vm.Session([vm.QUARTER, vm.QUARTER, vm.QUARTER], vm.CANDY),
+                          vm.Session([vm.DIME], None, True)])
+
+        summary = replay_log(log)
+
+        self.assertEqual({vm.NICKEL : 2, vm.DIME : 0, vm.QUARTER : 3}, summary.coin_inventory)
+        self.assertEqual(1, summary.product_inventory[vm.CANDY])
+        self.assertEqual({vm.CANDY : 1}, summary.dispensed)
+        self.assertEqual(10, summary.change)
+        self.assertEqual(10, summary.refund)
+        self.assertEqual(2, summary.sessions)
+
+    def test_parallel_replay_matches_serial_replay(self):
+        serial = replay_logs(self.logs, processes=1)
+        parallel = replay_logs(self.logs, processes=2, shard_size=3)
+
+        self.assertEqual(serial, parallel)
+
+    def test_merge(self):
+        summaries = replay_logs(self.logs, processes=1)
+        totals = merge(summaries)
+
+        self.assertEqual(20, totals.machines)
+        self.assertEqual(1000, totals.sessions)
+        self.assertEqual(sum(summary.change for summary in summaries), totals.change)
+        self.assertEqual(sum(summary.coin_inventory[vm.QUARTER] for summary in summaries),
+                         totals.coin_inventory[vm.QUARTER])
+        self.assertEqual(sum(summary.dispensed.get(vm.COLA, 0) for summary in summaries),
+                         totals.dispensed.get(vm.COLA, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+    Tests for vending_machine.state_store.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import vending_machine as vm
+from vending_machine import VendingMachine
+from vending_machine.state_store import (COIN_INVENTORY, CURRENT_AMOUNT, PRODUCT_INVENTORY,
+                                         FleetStateStore)
+
+class OtherProductsVendingMachine(VendingMachine):
+    PRODUCTS = {"WATER" : 85}
+
+class FleetStateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "fleet.state")
+        self.store = FleetStateStore.create(self.path, 100)
+
+    def tearDown(self):
+        if not self.store.mmap.closed:
+            self.store.close()
+        shutil.rmtree(self.directory)
+
+    def reopen(self):
+        self.store.close()
+        self.store = FleetStateStore(self.path)
+
+    def test_new_store_has_empty_machines(self):
+        self.assertEqual(100, len(self.store))
+        self.assertEqual(0, self.store.total(COIN_INVENTORY, vm.QUARTER))
+        self.assertEqual("SOLD OUT", self.store[42].display)
+
+    def test_machines_are_built_on_first_access(self):
+        self.assertEqual({}, self.store.machines)
+        machine = self.store[3]
+        self.assertIs(machine, self.store[3])
+        self.assertEqual([3], list(self.store.machines))
+
+    def test_index_outside_fleet_should_raise_index_error(self):
+        with self.assertRaises(IndexError):
+            self.store[100]
+
+    def test_machine_state_survives_reopening(self):
+        machine = self.store[7]
+        machine.coin_inventory[vm.NICKEL] = 4
+        machine.product_inventory[vm.COLA] = 2
+        machine.insert_coin(vm.QUARTER)
+        machine.insert_coin(vm.DIME)
+
+        self.reopen()
+        machine = self.store[7]
+
+        self.assertEqual(4, machine.coin_inventory[vm.NICKEL])
+        self.assertEqual(2, machine.product_inventory[vm.COLA])
+        self.assertEqual(1, machine.inserted_coins[vm.QUARTER])
+        self.assertEqual(35, machine.current_amount)
+        self.assertEqual("$0.35", machine.display)
+
+    def test_columns_are_read_without_copying(self):
+        for index in range(10):
+            self.store[index].product_inventory[vm.CANDY] = index
+        self.store.flush()
+
+        column = self.store.column(PRODUCT_INVENTORY, vm.CANDY)
+        self.assertEqual(list(range(10)) + [0] * 90, column.tolist())
+        self.assertEqual(45, self.store.total(PRODUCT_INVENTORY, vm.CANDY))
+
+        column[50] = 5
+        self.assertEqual(5, self.store[50].product_inventory[vm.CANDY])
+        column.release()
+
+    def test_save_machine_from_elsewhere(self):
+        machine = VendingMachine()
+        machine.insert_coin(vm.QUARTER)
+        self.store.save(99, machine)
+
+        self.assertEqual(25, self.store.column(CURRENT_AMOUNT)[99])
+
+    def test_open_with_other_machine_class_should_raise_value_error(self):
+        self.store.close()
+        with self.assertRaises(ValueError):
+            FleetStateStore(self.path, OtherProductsVendingMachine)
+
+    def test_open_truncated_file_should_raise_value_error(self):
+        self.store.close()
+        for length in (200, 20, 0):
+            with open(self.path, "r+b") as file:
+                file.truncate(length)
+            with self.assertRaises(ValueError):
+                FleetStateStore(self.path)
+
+    def test_close_with_column_in_use_should_raise_buffer_error(self):
+        column = self.store.column(PRODUCT_INVENTORY, vm.COLA)
+        with self.assertRaises(BufferError):
+            self.store.close()
+
+        self.store[5].product_inventory[vm.COLA] = 3
+        self.store.flush()
+        self.assertEqual(3, column[5])
+        column.release()
+        self.store.close()
+        self.assertTrue(self.store.file.closed)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+    Tests for vending_machine.thread_safe_vending_machine.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+import vending_machine as vm
+from vending_machine.catalog import Catalog
+from vending_machine.journal import Journal, recover
+from vending_machine.thread_safe_vending_machine import ThreadSafeVendingMachine
+
+class ForeignCoinVendingMachine(ThreadSafeVendingMachine):
+    VALID_COINS = {"SEVEN" : 7, "FIVE" : 5, "ONE" : 1}
+
+def run_threads(count, target, *args):
+    """Run the target in a number of threads and wait for them to finish."""
+    threads = [threading.Thread(target=target, args=args) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def coin_value(machine, coins):
+    """Return the value in cents of a dictionary of coins."""
+    return sum(machine.VALID_COINS[coin] * quantity for coin, quantity in coins.items())
+
+def assert_conserved(test, machine, results, product, stock, coins, inserted):
+    """
+    Assert that purchases on a machine neither made nor lost products,
+    coins or money.
+
+    Args:
+        results (list): Results of the purchases.
+        stock (int): Quantity of the product before the purchases.
+        coins (int): Value in cents of the coin inventory before the purchases.
+        inserted (int): Value in cents of the coins inserted.
+    """
+    sold = sum(1 for dispensed, _ in results if dispensed)
+    change = sum(change for _, change in results)
+    test.assertEqual(stock - sold, machine.product_inventory[product])
+    test.assertEqual(change, coin_value(machine, machine.coin_return))
+    test.assertEqual(coins + inserted,
+                     coin_value(machine, machine.coin_inventory) + change
+                     + coin_value(machine, machine.inserted_coins))
+    test.assertEqual(inserted, sold * machine.prices[product] + change + machine.current_amount)
+
+class ContendedTestCase(unittest.TestCase):
+    """Test case that switches threads often so that they contend for shared state."""
+
+    def setUp(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+class ThreadSafeVendingMachineTest(ContendedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.machine = ThreadSafeVendingMachine()
+        self.machine.product_inventory[vm.CANDY] = 1000
+        self.machine.coin_inventory[vm.NICKEL] = 1000
+
+    def test_concurrent_inserts(self):
+        def insert():
+            for _ in range(1000):
+                self.machine.insert_coin(vm.DIME)
+
+        run_threads(8, insert)
+
+        self.assertEqual(8000, self.machine.inserted_coins[vm.DIME])
+        self.assertEqual(80000, self.machine.current_amount)
+
+    def test_concurrent_purchases_keep_inventories_consistent(self):
+        results = []
+
+        def buy():
+            for _ in range(50):
+                for coin in (vm.QUARTER, vm.QUARTER, vm.DIME, vm.NICKEL):
+                    self.machine.insert_coin(coin)
+                results.append(self.machine.purchase(vm.CANDY))
+
+        run_threads(8, buy)
+
+        assert_conserved(self, self.machine, results, vm.CANDY, 1000, 5000, 400 * 65)
+
+    def test_purchase_without_enough_money(self):
+        self.assertEqual((False, 0), self.machine.purchase(vm.CANDY))
+        self.assertEqual("PRICE $0.65", self.machine.display)
+
+    def test_display_reads_cached_message(self):
+        self.assertEqual("INSERT COIN", self.machine.display)
+        self.machine.insert_coin(vm.DIME)
+        self.assertEqual("$0.10", self.machine.display)
+        self.assertEqual("$0.10", self.machine.display_unit.standard)
+
+    def test_machines_have_separate_locks(self):
+        self.assertIsNot(self.machine.lock, ThreadSafeVendingMachine().lock)
+
+    def test_machine_with_catalog(self):
+        machine = ThreadSafeVendingMachine(catalog=Catalog([("B1", "WATER", 85, 2)]))
+        for coin in (vm.QUARTER, vm.QUARTER, vm.QUARTER, vm.DIME):
+            machine.insert_coin(coin)
+
+        self.assertTrue(machine.select("B1"))
+        self.assertEqual(1, machine.product_inventory["WATER"])
+
+    def test_recover_journal_of_thread_safe_machine(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "machine.journal")
+        journal = Journal(path)
+        journal.attach(self.machine)
+        self.machine.insert_coin(vm.DIME)
+        journal.close()
+
+        recovered = recover(path, ThreadSafeVendingMachine)
+        shutil.rmtree(directory)
+
+        self.assertIsInstance(recovered, ThreadSafeVendingMachine)
+        self.assertEqual(10, recovered.current_amount)
+
+class SharedChangeStrategyTest(ContendedTestCase):
+    def test_concurrent_purchases_on_machines_sharing_a_coin_set(self):
+        machines = [ForeignCoinVendingMachine() for _ in range(4)]
+        for machine in machines:
+            machine.product_inventory[vm.CHIPS] = 1000
+            machine.coin_inventory["FIVE"] = 100
+            machine.coin_inventory["ONE"] = 100
+        results = [[] for _ in machines]
+
+        def buy(offset):
+            for purchase in range(100):
+                index = (offset + purchase) % len(machines)
+                machine = machines[index]
+                for _ in range(8):
+                    machine.insert_coin("SEVEN")
+                results[index].append(machine.purchase(vm.CHIPS))
+
+        threads = [threading.Thread(target=buy, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for machine, machine_results in zip(machines, results):
+            self.assertEqual(200, len(machine_results))
+            assert_conserved(self, machine, machine_results, vm.CHIPS, 1000, 600, 200 * 56)
+
+    def test_machines_share_change_cache_across_threads(self):
+        coins_desc = [("SEVEN", 7), ("FIVE", 5), ("ONE", 1)]
+        strategy = vm.CachedStrategy(vm.OptimalStrategy(coins_desc), maxsize=4)
+        machines = [ForeignCoinVendingMachine(strategy) for _ in range(8)]
+        made = []
+        errors = []
+
+        def make_change(machine, seed):
+            rng = random.Random(seed)
+            count = 0
+            try:
+                for _ in range(2500):
+                    for coin in ("SEVEN", "FIVE", "ONE"):
+                        machine.coin_inventory[coin] = rng.randint(0, 2)
+                    if machine.make_change(rng.randint(1, 10)):
+                        count += 1
+            except Exception as error:
+                errors.append(error)
+            made.append(count)
+
+        threads = [threading.Thread(target=make_change, args=(machine, seed))
+                   for seed, machine in enumerate(machines)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        info = strategy.cache_info()
+        self.assertEqual([], errors)
+        self.assertEqual(sum(made), info.hits + info.misses)
+        self.assertLessEqual(info.size, 4)
+
+if __name__ == '__main__':
+    unittest.main()
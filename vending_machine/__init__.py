@@ -0,0 +1,1050 @@
+"""
+    Vending machine kata.
+    Author: John Wheeler
+    Date: 08/29/2017
+"""
+
+from _thread import allocate_lock
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+from collections.abc import MutableMapping
+
+# Coins
+PENNY = "PENNY"
+NICKEL = "NICKEL"
+DIME = "DIME"
+QUARTER = "QUARTER"
+
+# Products
+COLA = "COLA"
+CHIPS = "CHIPS"
+CANDY = "CANDY"
+
+# Events passed to vending machine observers
+COIN_ACCEPTED = "COIN_ACCEPTED"
+COIN_REJECTED = "COIN_REJECTED"
+PRODUCT_DISPENSED = "PRODUCT_DISPENSED"
+CHANGE_RETURNED = "CHANGE_RETURNED"
+COINS_RETURNED = "COINS_RETURNED"
+PRODUCT_RESTOCKED = "PRODUCT_RESTOCKED"
+COINS_REFILLED = "COINS_REFILLED"
+
+# Customer session: coins inserted, product selected (or None) and whether
+# the coin return button was pressed at the end.
+Session = namedtuple("Session", ["coins", "product", "return_coins"], defaults=[None, False])
+
+# Outcome of a customer session: product dispensed (or ""), cents returned
+# as change, cents of inserted coins returned and the display afterwards.
+SessionResult = namedtuple("SessionResult", ["dispensed", "change", "refund", "display"])
+
+# Statistics of a change cache.
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "size", "maxsize"])
+
+def zero_counts(size):
+    """Return a new array of zero quantities."""
+    return array("q", bytes(8 * size))
+
+def add_counts(totals, counts):
+    """Add a dictionary of quantities into a dictionary of totals."""
+    for name, quantity in counts.items():
+        totals[name] = totals.get(name, 0) + quantity
+
+def format_amount(amount):
+    """Format an amount in cents as dollars for the display, i.e. 65 -> "$0.65"."""
+    return "$%d.%02d" % divmod(amount, 100)
+
+class ChangeTable():
+    """
+    Bounded knapsack table of the change amounts a coin inventory can make.
+
+    For every amount in cents up to the table limit, the table holds the
+    number of distinct subsets of the coin inventory that sum to it. Adding
+    or removing a single coin updates the table in one pass, so asking
+    whether change can be made for an amount is a list lookup.
+
+    Coins beyond the number that could ever be used for an amount within the
+    limit are counted but not added to the table, which keeps both the table
+    and its subset counts bounded. Amounts above the limit are worked out
+    when asked for, without growing the table.
+    """
+
+    __slots__ = ("coin_values", "counts", "limit", "ways")
+
+    def __init__(self, coin_values, limit=0):
+        # Value of each coin in cents, indexed by coin index.
+        self.coin_values = coin_values
+
+        # Number of each coin held by the inventory, indexed by coin index.
+        self.counts = [0] * len(coin_values)
+
+        # Largest amount in cents the table answers for.
+        self.limit = limit
+
+        # Number of coin subsets that sum to each amount.
+        self.ways = [1] + [0] * limit
+
+    def _usable(self, index, count):
+        """Return the number of coins that can take part in an amount within the limit."""
+        return min(count, self.limit // self.coin_values[index])
+
+    def _add(self, value):
+        """Add a single coin of the given value to the table."""
+        ways = self.ways
+        for amount in range(self.limit, value - 1, -1):
+            ways[amount] += ways[amount - value]
+
+    def _remove(self, value):
+        """Remove a single coin of the given value from the table."""
+        ways = self.ways
+        for amount in range(value, self.limit + 1):
+            ways[amount] -= ways[amount - value]
+
+    def set_count(self, index, count):
+        """Update the table for a new quantity of the coin at the index."""
+        old_usable = self._usable(index, self.counts[index])
+        new_usable = self._usable(index, count)
+        self.counts[index] = count
+
+        value = self.coin_values[index]
+        for _ in range(new_usable - old_usable):
+            self._add(value)
+        for _ in range(old_usable - new_usable):
+            self._remove(value)
+
+    def _can_make_beyond_limit(self, amount):
+        """
+        Work out whether the coin counts can make an amount above the table
+        limit without changing the table. For each amount, tracks how many of
+        the current coin are left after reaching it, which takes one pass over
+        the amounts per coin however many coins there are.
+        """
+        reachable = bytearray(amount + 1)
+        reachable[0] = 1
+        for value, count in zip(self.coin_values, self.counts):
+            if count <= 0:
+                continue
+
+            left = [0] * (amount + 1)
+            for total in range(amount + 1):
+                if reachable[total]:
+                    left[total] = count
+                elif total >= value and left[total - value] > 0:
+                    reachable[total] = 1
+                    left[total] = left[total - value] - 1
+
+        return reachable[amount] == 1
+
+    def can_make(self, amount):
+        """Return True if the inventory holds coins summing exactly to the amount in cents."""
+        if amount < 0:
+            return False
+
+        if amount > self.limit:
+            return self._can_make_beyond_limit(amount)
+
+        return self.ways[amount] > 0
+
+class CountView(MutableMapping):
+    """
+    Dictionary style view of quantities kept in an array.
+    Every key of the index is always present and keys cannot be added
+    or removed.
+
+    Key = coin or product name. Value = quantity.
+    """
+
+    __slots__ = ("index", "counts")
+
+    def __init__(self, index, counts):
+        # Position of each key in the array.
+        self.index = index
+
+        # Quantity for each key.
+        self.counts = counts
+
+    def __getitem__(self, key):
+        return self.counts[self.index[key]]
+
+    def __setitem__(self, key, quantity):
+        self.counts[self.index[key]] = quantity
+
+    def __delitem__(self, key):
+        raise TypeError("%s cannot be removed" % key)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class DisplayUnit():
+    """
+    Vending machine display unit.
+
+    The display is either holding a custom message, i.e. THANK YOU, which is
+    shown the next time the display is checked, or showing the standard
+    message: SOLD OUT, the current amount, EXACT CHANGE ONLY or INSERT COIN.
+    The standard message is cached and only worked out again after a change
+    to the product inventory, coin inventory or current amount invalidates it.
+    """
+
+    __slots__ = ("message", "standard")
+
+    def __init__(self):
+        # Custom message waiting to be shown.
+        self.message = ""
+
+        # Cached standard message, or None if it needs to be worked out.
+        self.standard = None
+
+class CoinInventory(CountView):
+    """
+    Coin inventory that keeps a change table in step with its quantities.
+
+    Key = coin name. Value = quantity.
+    """
+
+    __slots__ = ("change_table", "display_unit")
+
+    def __init__(self, index, counts, change_table, display_unit):
+        super().__init__(index, counts)
+        self.change_table = change_table
+        self.display_unit = display_unit
+
+    def __setitem__(self, coin, quantity):
+        index = self.index[coin]
+        self.counts[index] = quantity
+        self.change_table.set_count(index, quantity)
+        self.display_unit.standard = None
+
+class ProductInventory(CountView):
+    """
+    Product inventory that invalidates the display when a quantity changes.
+
+    Key = product name. Value = quantity.
+    """
+
+    __slots__ = ("display_unit",)
+
+    def __init__(self, index, counts, display_unit):
+        super().__init__(index, counts)
+        self.display_unit = display_unit
+
+    def __setitem__(self, product, quantity):
+        self.counts[self.index[product]] = quantity
+        self.display_unit.standard = None
+
+class CoinReturn(MutableMapping):
+    """
+    Coin return bin. Only coins that have been returned are present.
+    Acceptable coins are counted in an array and rejected coins in a
+    dictionary created the first time one is returned.
+
+    Key = coin name. Value = quantity.
+    """
+
+    __slots__ = ("index", "counts", "rejected")
+
+    def __init__(self, index, counts):
+        # Position of each acceptable coin in the array.
+        self.index = index
+
+        # Quantity of each acceptable coin.
+        self.counts = counts
+
+        # Rejected coins and their quantity.
+        self.rejected = None
+
+    def __getitem__(self, coin):
+        if coin in self.index:
+            quantity = self.counts[self.index[coin]]
+            if quantity > 0:
+                return quantity
+        elif self.rejected is not None and coin in self.rejected:
+            return self.rejected[coin]
+
+        raise KeyError(coin)
+
+    def __setitem__(self, coin, quantity):
+        if coin in self.index:
+            self.counts[self.index[coin]] = quantity
+        else:
+            if self.rejected is None:
+                self.rejected = {}
+            self.rejected[coin] = quantity
+
+    def __delitem__(self, coin):
+        # Raise KeyError if the coin is not in the coin return.
+        self[coin]
+        if coin in self.index:
+            self.counts[self.index[coin]] = 0
+        else:
+            del self.rejected[coin]
+
+    def __iter__(self):
+        for coin, index in self.index.items():
+            if self.counts[index] > 0:
+                yield coin
+
+        if self.rejected is not None:
+            yield from self.rejected
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class GreedyStrategy():
+    """
+    Make change by taking as many of the largest coin as possible before
+    moving on to the next coin.
+
+    Greedy change is only guarenteed for canonical coin sets, and even then
+    a limited coin inventory can leave it short. When it comes up short, the
+    fallback strategy is used instead if one is given.
+    """
+
+    def __init__(self, coins_desc, fallback=None):
+        # Coins ordered in the descending direction by coin value.
+        self.coins_desc = coins_desc
+        self.fallback = fallback
+
+    def make_change(self, amount, inventory):
+        """
+        Choose the coins to return for the amount.
+
+        Args:
+            amount (int): The amount of change needed in cents.
+            inventory (dict): Coin name and quantity available.
+
+        Returns:
+            Dictionary of coin name and quantity, or None if change cannot be made.
+        """
+        change = {}
+        remaining = amount
+        for coin_name, coin_value in self.coins_desc:
+            quantity = min(remaining // coin_value, inventory[coin_name])
+            if quantity > 0:
+                change[coin_name] = quantity
+                remaining -= quantity * coin_value
+
+        if remaining == 0:
+            return change
+
+        if self.fallback is not None:
+            return self.fallback.make_change(amount, inventory)
+
+        return None
+
+class OptimalStrategy():
+    """
+    Make change with the fewest coins using a bounded knapsack over the
+    coin inventory. Works for any coin set.
+
+    The quantity available of each coin is split into chunks of 1, 2, 4 and
+    so on coins, plus whatever is left over, and each chunk is used whole or
+    not at all. Any quantity up to the quantity available is a sum of
+    chunks, so the fewest coins are still found, in time proportional to
+    the amount times the number of chunks rather than the quantities.
+    """
+
+    def __init__(self, coins_desc):
+        # Coins ordered in the descending direction by coin value.
+        self.coins_desc = coins_desc
+
+    def make_change(self, amount, inventory):
+        """
+        Choose the coins to return for the amount.
+
+        Args:
+            amount (int): The amount of change needed in cents.
+            inventory (dict): Coin name and quantity available.
+
+        Returns:
+            Dictionary of coin name and quantity, or None if change cannot be made.
+        """
+        unreachable = amount + 1
+
+        # Fewest coins needed for each amount using the chunks seen so far,
+        # and for each chunk the amounts it was used to reach.
+        fewest = [0] + [unreachable] * amount
+        chunks = []
+        for coin_name, coin_value in self.coins_desc:
+            available = min(inventory[coin_name], amount // coin_value)
+            size = 1
+            while available > 0:
+                quantity = min(size, available)
+                offset = quantity * coin_value
+                used = bytearray(amount + 1)
+                # Amounts are visited downwards so that each chunk is used
+                # at most once.
+                for value in range(amount, offset - 1, -1):
+                    coins = fewest[value - offset] + quantity
+                    if coins < fewest[value]:
+                        fewest[value] = coins
+                        used[value] = 1
+                chunks.append((coin_name, quantity, offset, used))
+                available -= quantity
+                size *= 2
+
+        if fewest[amount] == unreachable:
+            return None
+
+        # Walk back through the chunks to recover the quantities used.
+        change = {}
+        remaining = amount
+        for coin_name, quantity, offset, used in reversed(chunks):
+            if used[remaining]:
+                change[coin_name] = change.get(coin_name, 0) + quantity
+                remaining -= offset
+
+        return change
+
+class CachedStrategy():
+    """
+    Change strategy that remembers the coins another strategy chose.
+
+    The coins chosen for an amount only depend on how many of each coin the
+    inventory could use for that amount, so entries are keyed on the amount
+    and the inventory quantities capped at that many. Any change to the
+    inventory that could alter the choice changes the key, so entries never
+    go stale. The least recently used entry is evicted once the cache holds
+    maxsize entries.
+
+    The returned dictionaries are shared by later hits and must not be
+    modified.
+
+    A cached strategy is shared by every machine with the same coin set,
+    so the cache has its own lock. The wrapped strategy runs outside the
+    lock, so machines missing the cache at once do not wait on each other.
+    """
+
+    def __init__(self, strategy, maxsize=1024):
+        self.strategy = strategy
+        self.maxsize = maxsize
+
+        # Coins ordered in the descending direction by coin value.
+        self.coins_desc = strategy.coins_desc
+
+        # Key = amount and capped quantities. Value = coins chosen or None.
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Guards the entries and statistics. Taken from _thread so that
+        # importing the vending machine does not import threading.
+        self.lock = allocate_lock()
+
+    def make_change(self, amount, inventory):
+        """See OptimalStrategy.make_change()."""
+        key = (amount,) + tuple(min(inventory[coin_name], amount // coin_value)
+                                for coin_name, coin_value in self.coins_desc)
+        entries = self.entries
+        with self.lock:
+            if key in entries:
+                self.hits += 1
+                entries.move_to_end(key)
+                return entries[key]
+
+            self.misses += 1
+
+        change = self.strategy.make_change(amount, inventory)
+        with self.lock:
+            entries[key] = change
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+        return change
+
+    def cache_info(self):
+        """Return the hits, misses, evictions and size of the cache."""
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self.entries),
+                             self.maxsize)
+
+    def cache_clear(self):
+        """Remove every entry and reset the statistics."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+def is_canonical(coin_values):
+    """
+    Returns True if greedy change is always the fewest coins for the coin
+    values given an unlimited supply of each coin.
+
+    Any amount where greedy change is worse is below the sum of the two
+    largest coins, so only amounts up to that sum need checking.
+    """
+    values = sorted(coin_values, reverse=True)
+    if len(values) < 3:
+        return True
+
+    limit = values[0] + values[1]
+    unreachable = limit + 1
+    fewest = [0] + [unreachable] * limit
+    for amount in range(1, limit + 1):
+        for value in values:
+            if value <= amount and fewest[amount - value] + 1 < fewest[amount]:
+                fewest[amount] = fewest[amount - value] + 1
+
+        greedy = 0
+        remaining = amount
+        for value in values:
+            greedy += remaining // value
+            remaining %= value
+        if remaining:
+            greedy = unreachable
+
+        if greedy > fewest[amount]:
+            return False
+
+    return True
+
+# Change strategies already chosen for a coin set.
+# Key = coin names and values. Value = change strategy.
+_change_strategies = {}
+
+# Cached optimal change strategies already built for a coin set.
+# Key = coin names and values. Value = change strategy.
+_optimal_strategies = {}
+
+def optimal_strategy_for(valid_coins):
+    """
+    Return the cached optimal change strategy for the coin set. Built once
+    per coin set and shared between vending machines.
+    """
+    key = tuple(sorted(valid_coins.items()))
+    if key not in _optimal_strategies:
+        coins_desc = sorted(valid_coins.items(), key=lambda x: x[1], reverse=True)
+        _optimal_strategies[key] = CachedStrategy(OptimalStrategy(coins_desc))
+
+    return _optimal_strategies[key]
+
+def change_strategy_for(valid_coins):
+    """
+    Return the fastest correct change strategy for the coin set.
+    Greedy change with an optimal fallback is used for canonical coin
+    sets and optimal change otherwise. Optimal change is cached. Strategies
+    are built once per coin set and shared between vending machines, so
+    the cache is too.
+    """
+    key = tuple(sorted(valid_coins.items()))
+    if key not in _change_strategies:
+        coins_desc = sorted(valid_coins.items(), key=lambda x: x[1], reverse=True)
+        optimal = optimal_strategy_for(valid_coins)
+        if is_canonical(valid_coins.values()):
+            _change_strategies[key] = GreedyStrategy(coins_desc, fallback=optimal)
+        else:
+            _change_strategies[key] = optimal
+
+    return _change_strategies[key]
+
+class MachineLayout():
+    """
+    Position of each coin and product of a vending machine class in the
+    arrays holding a machine's quantities. Built once per class and shared
+    by every machine of the class.
+    """
+
+    __slots__ = ("coin_index", "coin_values", "product_index",
+                 "exact_change_amounts", "change_limit")
+
+    def __init__(self, valid_coins, products):
+        # Key = coin name. Value = position in the coin arrays.
+        self.coin_index = {coin: index for index, coin in enumerate(valid_coins)}
+
+        # Value of each coin in cents, in coin array order.
+        self.coin_values = list(valid_coins.values())
+
+        # Key = product name. Value = position in the product array.
+        self.product_index = {product: index for index, product in enumerate(products)}
+
+        min_coin = min(self.coin_values)
+        max_coin = max(self.coin_values)
+
+        # In order to guarentee that change can be made, the coin inventory
+        # must be able to make change for any amount up to the difference
+        # in the minimum coin value and maximum value coin value beginning
+        # at the minimum coin value and incrementing by the minimum coin
+        # value afterwards.
+        self.change_limit = max_coin - min_coin
+        self.exact_change_amounts = range(min_coin, self.change_limit + 1, min_coin)
+
+# Layouts already built for a vending machine class and product set.
+# Key = vending machine class and product names. Value = machine layout.
+_layouts = {}
+
+def layout_for(machine_class, products=None):
+    """
+    Return the machine layout for the vending machine class. The class's
+    PRODUCTS are used unless other product names are given.
+    """
+    if products is None:
+        products = machine_class.PRODUCTS
+
+    key = (machine_class, tuple(products))
+    if key not in _layouts:
+        _layouts[key] = MachineLayout(machine_class.VALID_COINS, products)
+
+    return _layouts[key]
+
+class VendingMachine():
+    """Represents a vending machine."""
+
+    __slots__ = ("layout", "change_strategy", "change_table", "coin_inventory",
+                 "coin_return", "_current_amount", "display_unit", "product_dispense_bin",
+                 "product_inventory", "inserted_coins", "observers", "metrics",
+                 "catalog", "prices")
+
+    # Coins that the vending machine are able to accept and their value in cents.
+    VALID_COINS = {NICKEL : 5, DIME : 10, QUARTER : 25}
+
+    # Products that are in the vending machine and their price in cents.
+    PRODUCTS = {COLA : 100, CHIPS : 50, CANDY : 65}
+
+    # Slot codes the customer can select and the product in each slot.
+    SLOTS = {"A1" : COLA, "A2" : CHIPS, "A3" : CANDY}
+
+    # Coins reported by the coin acceptor, by the code it sends for each.
+    COIN_CODES = (PENNY, NICKEL, DIME, QUARTER)
+
+    def __init__(self, change_strategy=None, catalog=None):
+        # Product catalog with slots, prices and stock, or None to use the
+        # class's SLOTS and PRODUCTS. See catalog.Catalog.
+        self.catalog = catalog
+
+        # Price of each product in cents. Shared with the catalog, so price
+        # changes to the catalog apply to the machine straight away.
+        # Key = product name. Value = cents.
+        self.prices = self.PRODUCTS if catalog is None else catalog.prices
+
+        # Position of the coins and products in the quantity arrays.
+        layout = self.layout = layout_for(type(self), self.prices)
+
+        # Strategy used to choose the coins returned as change.
+        if change_strategy is None:
+            change_strategy = change_strategy_for(self.VALID_COINS)
+        self.change_strategy = change_strategy
+
+        # Vending machine display unit.
+        self.display_unit = DisplayUnit()
+
+        # Change amounts that can be made from the coin inventory.
+        self.change_table = ChangeTable(layout.coin_values, layout.change_limit)
+
+        # Current coin inventory.
+        # Key = coin name. Value = quantity.
+        self.coin_inventory = CoinInventory(layout.coin_index,
+                                            zero_counts(len(layout.coin_index)),
+                                            self.change_table,
+                                            self.display_unit)
+
+        # Coin return with number of coins.
+        # Key = coin name. Value = quantity.
+        self.coin_return = CoinReturn(layout.coin_index, zero_counts(len(layout.coin_index)))
+
+        # Monetary amount in cents inserted by the customer.
+        self._current_amount = 0
+
+        # Product dispense bin with the name of the product dispensed.
+        self.product_dispense_bin = ""
+
+        # Current product inventory. Product name and quantity.
+        self.product_inventory = ProductInventory(layout.product_index,
+                                                  zero_counts(len(layout.product_index)),
+                                                  self.display_unit)
+        if catalog is not None:
+            for product, quantity in catalog.stock.items():
+                self.product_inventory[product] = quantity
+
+        # Acceptable coins and the number entered by the customer.
+        # Key = coin name. Value = quantity.
+        self.inserted_coins = CountView(layout.coin_index, zero_counts(len(layout.coin_index)))
+
+        # Callables notified of state changing events with
+        # (machine, event, coin or product name, quantity).
+        self.observers = ()
+
+        # Operation metrics while the machine is instrumented. See metrics.instrument().
+        self.metrics = None
+
+    @property
+    def current_amount(self):
+        """Monetary amount in cents inserted by the customer."""
+        return self._current_amount
+
+    @current_amount.setter
+    def current_amount(self, value):
+        self._current_amount = value
+        self.display_unit.standard = None
+
+    @property
+    def display(self):
+        """Vending machine display."""
+        display_unit = self.display_unit
+        if display_unit.message:
+            # Toggle the display to show the custom message so that the
+            # standard display can be shown the next time it is checked.
+            tmp_str = display_unit.message
+            display_unit.message = ""
+            return tmp_str
+
+        if display_unit.standard is None:
+            display_unit.standard = self.standard_display()
+
+        return display_unit.standard
+
+    @display.setter
+    def display(self, value):
+        self.display_unit.message = value
+
+    def add_observer(self, observer):
+        """
+        Notify the observer of every state changing event.
+
+        Args:
+            observer (callable): Called with (machine, event, name, quantity)
+                where name is the coin or product the event is about.
+        """
+        self.observers = self.observers + (observer,)
+
+    def dispense_product(self, product):
+        """
+        Dispense the product once the user has entered enough money.
+        Coins will be transferred into the coin inventory and the product
+        moved into the product dispense bin for the customer to take.
+
+        Returns:
+            True if the product was dispensed.
+
+        Raises:
+            KeyError if the machine does not stock the product, i.e. it was
+            added to the machine's catalog after the machine was built.
+            Nothing is changed.
+        """
+        if product not in self.layout.product_index:
+            raise KeyError(product)
+
+        price = self.prices[product]
+        if self.current_amount < price:
+            self.display = "PRICE " + format_amount(price)
+            return False
+
+        # Move the inserted coins into the coin inventory.
+        for coin in self.inserted_coins:
+            if self.inserted_coins[coin] > 0:
+                self.coin_inventory[coin] += self.inserted_coins[coin]
+                self.inserted_coins[coin] = 0
+
+        # Dispense the product.
+        self.product_dispense_bin = product
+
+        # Remove the product from the coin inventory.
+        self.product_inventory[product] -= 1
+
+        self.current_amount -= price
+        self.display_unit.message = "THANK YOU"
+        if self.observers:
+            self.notify(PRODUCT_DISPENSED, product, 1)
+        return True
+
+    def exact_change_only(self):
+        """Return True if exact change is needed."""
+        ways = self.change_table.ways
+        for value_needed in self.layout.exact_change_amounts:
+            if ways[value_needed] == 0:
+                return True
+
+        return False
+
+    def insert_coin(self, coin):
+        """
+        Insert a coin into the vending machine.
+        Accepted coins will be placed into the inserted coins bin and the
+        value of the coin will be added to the current amount.
+        Rejected coins will be placed in the coin return bin.
+        """
+        index = self.layout.coin_index.get(coin)
+        if index is not None:
+            self.current_amount += self.VALID_COINS[coin]
+            self.inserted_coins.counts[index] += 1
+            if self.observers:
+                self.notify(COIN_ACCEPTED, coin, 1)
+        else:
+            # Place rejected coin in the coin return bin.
+            self.return_coin(coin, 1)
+            if self.observers:
+                self.notify(COIN_REJECTED, coin, 1)
+
+    def insert_coins(self, codes):
+        """
+        Insert a batch of coins reported by the coin acceptor. The result is
+        the same as inserting each coin with insert_coin(), but the coins are
+        tallied in one pass and the bins updated once for each kind of coin.
+        Observers are passed one event for each kind of coin, straight after
+        that kind is inserted.
+
+        Args:
+            codes (bytes): Code of each coin in COIN_CODES, i.e. a bytes,
+                bytearray, array or memoryview of small integers.
+
+        Returns:
+            The number of coins accepted.
+
+        Raises:
+            ValueError if a code is not in COIN_CODES. No coin is inserted.
+        """
+        tally = Counter(codes)
+        coin_codes = self.COIN_CODES
+        for code in tally:
+            if not 0 <= code < len(coin_codes):
+                raise ValueError("Unknown coin code %r" % code)
+
+        # Each kind of coin is inserted and its observers notified before the
+        # next, so an observer never sees coins it has not been told about.
+        coin_index = self.layout.coin_index
+        inserted = self.inserted_coins.counts
+        accepted = 0
+        for code, quantity in tally.items():
+            coin = coin_codes[code]
+            index = coin_index.get(coin)
+            if index is not None:
+                inserted[index] += quantity
+                accepted += quantity
+                self.current_amount += self.VALID_COINS[coin] * quantity
+                if self.observers:
+                    self.notify(COIN_ACCEPTED, coin, quantity)
+            else:
+                # Place rejected coins in the coin return bin.
+                self.return_coin(coin, quantity)
+                if self.observers:
+                    self.notify(COIN_REJECTED, coin, quantity)
+
+        return accepted
+
+    def is_machine_sold_out(self):
+        """Returns True if the vending machine is sold out of products."""
+        for quantity in self.product_inventory.counts:
+            if quantity > 0:
+                return False
+
+        return True
+
+    def is_valid_coin(self, coin):
+        """Returns True if the coin is a valid and acceptable coin."""
+        if coin in self.VALID_COINS:
+            return True
+
+        return False
+
+    def make_change(self, amount, return_coin=True):
+        """
+        Make change to return to the customer for the amount of they overpaid.
+
+        Algorithm:
+            Look up whether the coin inventory can make the amount in the
+            change table. If it can, the change strategy chooses the coins,
+            or optimal change does if the strategy comes up short, and they
+            are removed from the coin inventory and placed in the coin
+            return.
+
+        Args:
+            amount (int): The amount of change needed in cents.
+            return_coin (bool): True if the coins should be placed in the coin return.
+                                False if the coin inventory should not be modified.
+
+        Returns:
+            True if change can be made for the needed amount.
+        """
+        if not self.change_table.can_make(amount):
+            return False
+
+        if not return_coin:
+            return True
+
+        change = self.change_strategy.make_change(amount, self.coin_inventory)
+        if change is None:
+            # The change table says change can be made, so the strategy
+            # came up short, i.e. greedy change without a fallback.
+            change = optimal_strategy_for(self.VALID_COINS).make_change(amount,
+                                                                         self.coin_inventory)
+        for coin_name, quantity in change.items():
+            # Remove the coins from the coin inventory and return them
+            # to the customer.
+            self.coin_inventory[coin_name] -= quantity
+            self.return_coin(coin_name, quantity)
+            if self.observers:
+                self.notify(CHANGE_RETURNED, coin_name, quantity)
+
+        return True
+
+    def notify(self, event, name, quantity):
+        """Pass an event to each observer."""
+        for observer in self.observers:
+            observer(self, event, name, quantity)
+
+    def process_transactions(self, sessions):
+        """
+        Apply a stream of customer sessions to the vending machine.
+
+        For each session the coins are inserted and the product, if any, is
+        selected. When the product is dispensed, change for the rest of the
+        current amount is made if the coin inventory allows it. If the coin
+        return button was pressed, the inserted coins are returned. Finally
+        the display is read as a customer would.
+
+        Sessions are applied lazily as results are consumed, so a log of any
+        length can be replayed in constant memory.
+
+        Args:
+            sessions (iterable): Session records or (coins, product, return_coins) tuples.
+
+        Yields:
+            A SessionResult for each session.
+        """
+        insert_coin = self.insert_coin
+        for coins, product, return_coins in sessions:
+            for coin in coins:
+                insert_coin(coin)
+
+            dispensed = ""
+            change = 0
+            if product is not None and self.dispense_product(product):
+                dispensed = product
+                change = self.return_change()
+
+            refund = 0
+            if return_coins:
+                refund = self.current_amount
+                self.return_inserted_coins()
+                refund -= self.current_amount
+
+            yield SessionResult(dispensed, change, refund, self.display)
+
+    def refill_coins(self, quantities):
+        """
+        Add coins to the coin inventory.
+
+        Args:
+            quantities (dict): Key = coin name. Value = quantity added.
+        """
+        for coin, quantity in quantities.items():
+            self.coin_inventory[coin] += quantity
+            if self.observers:
+                self.notify(COINS_REFILLED, coin, quantity)
+
+    def remove_observer(self, observer):
+        """Stop notifying the observer of events."""
+        self.observers = tuple(o for o in self.observers if o != observer)
+
+    def restock(self, quantities):
+        """
+        Add products to the product inventory.
+
+        Args:
+            quantities (dict): Key = product name. Value = quantity added.
+        """
+        for product, quantity in quantities.items():
+            self.product_inventory[product] += quantity
+            if self.observers:
+                self.notify(PRODUCT_RESTOCKED, product, quantity)
+
+    def return_change(self):
+        """
+        Place change for the current amount in the coin return.
+        The current amount is kept if change cannot be made.
+
+        Returns:
+            The amount of change returned in cents.
+        """
+        change = self.current_amount
+        if change > 0 and self.make_change(change):
+            self.current_amount = 0
+            return change
+
+        return 0
+
+    def return_coin(self, coin, quantity):
+        """Place the returned coin(s) in the return coin bin."""
+        if coin in self.coin_return:
+            self.coin_return[coin] += quantity
+        else:
+            self.coin_return[coin] = quantity
+
+    def return_inserted_coins(self):
+        """Return the inserted coins to the customer."""
+        for coin in self.inserted_coins:
+            if self.inserted_coins[coin] > 0:
+                # Place coin in the return coin bin.
+                self.return_coin(coin, self.inserted_coins[coin])
+
+                self.current_amount -= (self.VALID_COINS[coin] * self.inserted_coins[coin])
+
+                # Remove the coin from the inserted coins bin.
+                quantity = self.inserted_coins[coin]
+                self.inserted_coins[coin] = 0
+                if self.observers:
+                    self.notify(COINS_RETURNED, coin, quantity)
+
+    def select(self, slot):
+        """
+        Select the product in a slot from the vending machine.
+
+        Args:
+            slot (str): Slot code entered by the customer, i.e. "A1".
+
+        Returns:
+            True if the product was dispensed.
+        """
+        slots = self.SLOTS if self.catalog is None else self.catalog.slots
+        return self.dispense_product(slots[slot])
+
+    def select_cola(self):
+        """Select cola from the vending machine."""
+        return self.dispense_product(COLA)
+
+    def select_chips(self):
+        """Select chips from the vending machine."""
+        return self.dispense_product(CHIPS)
+
+    def select_candy(self):
+        """Select candy from the vending machine."""
+        return self.dispense_product(CANDY)
+
+    def standard_display(self):
+        """Work out the message shown when there is no custom message."""
+        if self.is_machine_sold_out():
+            return "SOLD OUT"
+
+        if self._current_amount > 0:
+            return format_amount(self._current_amount)
+
+        if self.exact_change_only():
+            return "EXACT CHANGE ONLY"
+
+        return "INSERT COIN"
+
+# Optional subsystems, submodules of this package imported the first time
+# they are used, i.e. vending_machine.catalog.Catalog, so that importing the
+# vending machine itself only imports what the machine needs.
+SUBSYSTEMS = ("async_vending_machine", "catalog", "events", "fleet", "forecast", "journal",
+              "ledger", "metrics", "persistence", "replay", "state_store",
+              "thread_safe_vending_machine")
+
+def __getattr__(name):
+    """Import an optional subsystem on first use."""
+    if name not in SUBSYSTEMS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    from importlib import import_module
+    module = import_module("." + name, __name__)
+    globals()[name] = module
+    return module
@@ -0,0 +1,159 @@
+"""
+    Asyncio front-end for driving many vending machines from one event loop.
+"""
+
+import asyncio
+
+from vending_machine import VendingMachine
+
+class AsyncVendingMachine():
+    """
+    Awaitable wrapper around a vending machine.
+
+    Operations on the machine are serialized with a per-machine lock, so
+    any number of tasks can drive the same machine while different machines
+    run concurrently on the event loop. After each operation the message the
+    customer would see is published to display subscribers if it changed.
+    """
+
+    def __init__(self, machine=None):
+        if machine is None:
+            machine = VendingMachine()
+        self.machine = machine
+
+        # Serializes operations on the machine.
+        self.lock = asyncio.Lock()
+
+        # Queues of display subscribers.
+        self.subscribers = []
+
+        # Display message last published to subscribers.
+        self.published = None
+
+    def _pending_display(self):
+        """Return the message the display would show without clearing a custom message."""
+        message = self.machine.display_unit.message
+        if message:
+            return message
+
+        return self.machine.display
+
+    def _publish(self):
+        """Send the display message to subscribers if it changed."""
+        message = self._pending_display()
+        if message == self.published:
+            return
+
+        self.published = message
+        for queue in self.subscribers:
+            if queue.full():
+                # Slow subscribers only need the latest message.
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    async def _run(self, operation, *args):
+        """Run a machine operation under the lock and publish the display."""
+        async with self.lock:
+            result = operation(*args)
+            self._publish()
+            return result
+
+    async def insert_coin(self, coin):
+        """See VendingMachine.insert_coin()."""
+        return await self._run(self.machine.insert_coin, coin)
+
+    async def insert_coins(self, codes):
+        """See VendingMachine.insert_coins()."""
+        return await self._run(self.machine.insert_coins, codes)
+
+    async def dispense_product(self, product):
+        """See VendingMachine.dispense_product()."""
+        return await self._run(self.machine.dispense_product, product)
+
+    async def return_inserted_coins(self):
+        """See VendingMachine.return_inserted_coins()."""
+        return await self._run(self.machine.return_inserted_coins)
+
+    async def select(self, slot):
+        """See VendingMachine.select()."""
+        return await self._run(self.machine.select, slot)
+
+    async def select_cola(self):
+        """Select cola from the vending machine."""
+        return await self._run(self.machine.select_cola)
+
+    async def select_chips(self):
+        """Select chips from the vending machine."""
+        return await self._run(self.machine.select_chips)
+
+    async def select_candy(self):
+        """Select candy from the vending machine."""
+        return await self._run(self.machine.select_candy)
+
+    async def display(self):
+        """Check the vending machine display. See VendingMachine.display."""
+        async with self.lock:
+            message = self.machine.display
+            self._publish()
+            return message
+
+    def subscribe(self, maxsize=16):
+        """
+        Return a queue that receives each new display message. When the
+        queue is full the oldest message is dropped.
+        """
+        queue = asyncio.Queue(maxsize)
+        queue.put_nowait(self._pending_display())
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        """Stop sending display messages to the queue."""
+        self.subscribers.remove(queue)
+
+    async def display_changes(self, maxsize=16):
+        """Asynchronously iterate over display messages as they change."""
+        queue = self.subscribe(maxsize)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+class AsyncFleet():
+    """
+    Manages a set of asynchronous vending machines keyed by machine id.
+    """
+
+    def __init__(self, machine_class=VendingMachine):
+        self.machine_class = machine_class
+
+        # Key = machine id. Value = asynchronous vending machine.
+        self.machines = {}
+
+    def add(self, machine_id, machine=None):
+        """Add a vending machine to the fleet and return its asynchronous wrapper."""
+        if machine is None:
+            machine = self.machine_class()
+        self.machines[machine_id] = AsyncVendingMachine(machine)
+        return self.machines[machine_id]
+
+    def __getitem__(self, machine_id):
+        return self.machines[machine_id]
+
+    def __len__(self):
+        return len(self.machines)
+
+    async def run(self, operations):
+        """
+        Run operations on many machines concurrently.
+
+        Args:
+            operations (iterable): (machine id, operation name, args) tuples,
+                i.e. ("A1", "insert_coin", (QUARTER,)).
+
+        Returns:
+            List of the results in the order of the operations.
+        """
+        return await asyncio.gather(*(getattr(self.machines[machine_id], name)(*args)
+                                      for machine_id, name, args in operations))
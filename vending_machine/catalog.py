@@ -0,0 +1,115 @@
+"""
+    Product catalogs: which product is in each slot, its price and stock.
+
+    A catalog can be loaded from a CSV file with the columns
+    slot,product,price,stock where price is in dollars, i.e.
+
+        slot,product,price,stock
+        A1,COLA,1.00,12
+        A2,CHIPS,0.50,8
+
+    Machines built with a catalog share its price table, so changing the
+    catalog's prices reprices every one of those machines at once.
+"""
+
+import csv
+from collections import namedtuple
+
+# A slot of the catalog with its product, price in cents and stock.
+CatalogEntry = namedtuple("CatalogEntry", ["slot", "product", "price", "stock"])
+
+def parse_price(text):
+    """Convert a price in dollars, i.e. "1.25" or "$0.65", to cents without rounding errors."""
+    dollars, _, cents = text.strip().lstrip("$").partition(".")
+    if len(cents) > 2 or not (dollars or cents):
+        raise ValueError("invalid price: %r" % text)
+
+    return int(dollars or "0") * 100 + int(cents.ljust(2, "0"))
+
+class Catalog():
+    """
+    Products offered by a vending machine keyed by slot code. A product can
+    be in more than one slot, in which case its stock is the total of those
+    slots.
+    """
+
+    def __init__(self, entries=()):
+        # Key = slot code. Value = product name.
+        self.slots = {}
+
+        # Key = product name. Value = price in cents.
+        self.prices = {}
+
+        # Key = product name. Value = quantity loaded.
+        self.stock = {}
+
+        for entry in entries:
+            self.add(*entry)
+
+    def add(self, slot, product, price, stock=0):
+        """
+        Add a slot to the catalog. Machines already using the catalog do not
+        stock a product added this way; they raise KeyError when it is
+        selected, without taking the customer's money.
+        """
+        if slot in self.slots:
+            raise ValueError("slot %s is already in the catalog" % slot)
+        if self.prices.get(product, price) != price:
+            raise ValueError("%s has more than one price" % product)
+
+        self.slots[slot] = product
+        self.prices[product] = price
+        self.stock[product] = self.stock.get(product, 0) + stock
+
+    def __iter__(self):
+        for slot, product in self.slots.items():
+            yield CatalogEntry(slot, product, self.prices[product], self.stock[product])
+
+    def __len__(self):
+        return len(self.slots)
+
+    def product(self, slot):
+        """Return the product in a slot."""
+        return self.slots[slot]
+
+    def set_prices(self, prices):
+        """
+        Change prices in place. Every machine using the catalog charges the
+        new prices from its next sale.
+
+        Args:
+            prices (dict): Product name and new price in cents.
+        """
+        for product in prices:
+            if product not in self.prices:
+                raise KeyError(product)
+
+        self.prices.update(prices)
+
+    @classmethod
+    def from_csv(cls, csv_file):
+        """
+        Load a catalog from CSV with the columns slot,product,price,stock.
+
+        Args:
+            csv_file (file or str): Open file or path of the CSV file.
+        """
+        if isinstance(csv_file, str):
+            with open(csv_file, newline="") as opened_file:
+                return cls.from_csv(opened_file)
+
+        return cls((row["slot"], row["product"], parse_price(row["price"]), int(row.get("stock") or 0))
+                   for row in csv.DictReader(csv_file))
+
+def reprice(catalogs, prices):
+    """
+    Apply price changes to many catalogs, i.e. one per machine layout in a
+    fleet. Products a catalog does not carry are skipped.
+
+    Args:
+        catalogs (iterable): Catalogs to change.
+        prices (dict): Product name and new price in cents.
+    """
+    for catalog in catalogs:
+        catalog.set_prices({product: price for product, price in prices.items()
+                            if product in catalog.prices})
@@ -0,0 +1,207 @@
+"""
+    Push feed of vending machine state changes.
+
+    An EventFeed observes vending machines and turns their raw events into
+    the state changes that dashboards care about: a product selling out or
+    coming back in stock, the machine entering or leaving exact change
+    mode, a coin being rejected and a product being dispensed. A state
+    change is published only when it happens, so the display never needs to
+    be polled.
+
+    Each subscriber reads from its own bounded queue, and chooses what
+    happens to new events when it falls behind and the queue is full.
+"""
+
+import threading
+from collections import deque, namedtuple
+from queue import Empty
+
+import vending_machine as vm
+from vending_machine import VendingMachine
+
+# State changes published by the feed.
+SOLD_OUT = "SOLD_OUT"
+BACK_IN_STOCK = "BACK_IN_STOCK"
+EXACT_CHANGE_ENTERED = "EXACT_CHANGE_ENTERED"
+EXACT_CHANGE_LEFT = "EXACT_CHANGE_LEFT"
+COIN_REJECTED = vm.COIN_REJECTED
+PRODUCT_DISPENSED = vm.PRODUCT_DISPENSED
+
+# Overflow policies: what a full subscription does with a new event.
+DROP_OLDEST = "DROP_OLDEST"
+DROP_NEWEST = "DROP_NEWEST"
+BLOCK = "BLOCK"
+
+# State change of a machine: machine id, state change, coin or product
+# name (None for exact change mode) and quantity.
+Event = namedtuple("Event", ["machine_id", "event", "name", "quantity"])
+
+class Subscription():
+    """
+    Bounded queue of events for one subscriber. Events can be read from a
+    different thread than the one driving the machines.
+
+    Args:
+        maxsize (int): Most events held before the overflow policy applies.
+        overflow (str): DROP_OLDEST to make room by dropping the oldest event,
+            DROP_NEWEST to drop the new event, or BLOCK to make the machine
+            operation wait for the subscriber to read an event.
+        timeout (float): Seconds a BLOCK subscription waits before dropping
+            the new event. None waits forever.
+    """
+
+    def __init__(self, maxsize=256, overflow=DROP_OLDEST, timeout=None):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError("Unknown overflow policy %s" % overflow)
+
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.timeout = timeout
+
+        # Events waiting to be read, oldest first.
+        self.events = deque()
+
+        # Number of events dropped because the subscription was full.
+        self.dropped = 0
+
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.events)
+
+    def put(self, event):
+        """Add an event, applying the overflow policy if the subscription is full."""
+        events = self.events
+        with self.condition:
+            if len(events) >= self.maxsize:
+                if self.overflow == DROP_OLDEST:
+                    events.popleft()
+                    self.dropped += 1
+                elif self.overflow == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                elif not self.condition.wait_for(lambda: len(events) < self.maxsize,
+                                                 self.timeout):
+                    self.dropped += 1
+                    return
+
+            events.append(event)
+            self.condition.notify_all()
+
+    def get(self, block=True, timeout=None):
+        """
+        Remove and return the oldest event.
+
+        Raises:
+            queue.Empty if there is no event within the timeout, or at once
+            if block is False.
+        """
+        events = self.events
+        with self.condition:
+            if block:
+                self.condition.wait_for(lambda: events, timeout)
+            if not events:
+                raise Empty
+
+            event = events.popleft()
+            self.condition.notify_all()
+            return event
+
+    def drain(self):
+        """Remove and return every waiting event, oldest first."""
+        with self.condition:
+            events = list(self.events)
+            self.events.clear()
+            self.condition.notify_all()
+            return events
+
+class _MachineWatch():
+    """Observer of one machine that publishes its state changes to the feed."""
+
+    def __init__(self, feed, machine, machine_id):
+        self.feed = feed
+        self.machine = machine
+        self.machine_id = machine_id
+
+        # Whether the machine was last seen needing exact change. Checked
+        # without counting as an operation of an instrumented machine.
+        self.exact_change = VendingMachine.exact_change_only(machine)
+
+    def __call__(self, machine, event, name, quantity):
+        """Publish the state changes caused by a machine event."""
+        publish = self.feed.publish
+        machine_id = self.machine_id
+
+        if event == vm.COIN_REJECTED:
+            publish(Event(machine_id, COIN_REJECTED, name, quantity))
+            return
+
+        if event == vm.PRODUCT_DISPENSED:
+            publish(Event(machine_id, PRODUCT_DISPENSED, name, quantity))
+            if machine.product_inventory[name] == 0:
+                publish(Event(machine_id, SOLD_OUT, name, 0))
+        elif event == vm.PRODUCT_RESTOCKED:
+            stock = machine.product_inventory[name]
+            if stock - quantity <= 0 < stock:
+                publish(Event(machine_id, BACK_IN_STOCK, name, stock))
+            elif stock <= 0 < stock - quantity:
+                publish(Event(machine_id, SOLD_OUT, name, 0))
+            return
+        elif event not in (vm.CHANGE_RETURNED, vm.COINS_REFILLED):
+            # Inserted and returned coins leave the coin inventory alone.
+            return
+
+        exact_change = VendingMachine.exact_change_only(machine)
+        if exact_change != self.exact_change:
+            self.exact_change = exact_change
+            publish(Event(machine_id,
+                          EXACT_CHANGE_ENTERED if exact_change else EXACT_CHANGE_LEFT,
+                          None, 0))
+
+class EventFeed():
+    """
+    Publishes the state changes of any number of vending machines to
+    subscribers.
+
+    State changes are worked out from the events the machines pass to their
+    observers, so inventories changed directly through the dictionary views
+    are only noticed at the next event that could change them.
+    """
+
+    def __init__(self):
+        # Observer attached to each machine.
+        # Key = machine id. Value = machine watch.
+        self.watches = {}
+
+        # Subscriptions receiving events.
+        self.subscriptions = ()
+
+    def attach(self, machine, machine_id):
+        """Start publishing the state changes of the machine under the machine id."""
+        watch = _MachineWatch(self, machine, machine_id)
+        self.watches[machine_id] = watch
+        machine.add_observer(watch)
+
+    def detach(self, machine_id):
+        """Stop publishing the state changes of the machine with the machine id."""
+        watch = self.watches.pop(machine_id)
+        watch.machine.remove_observer(watch)
+
+    def subscribe(self, maxsize=256, overflow=DROP_OLDEST, timeout=None):
+        """
+        Return a new subscription receiving every state change from now on.
+        See Subscription for the arguments. A BLOCK subscription must be read
+        from another thread than the one driving the machines.
+        """
+        subscription = Subscription(maxsize, overflow, timeout)
+        self.subscriptions = self.subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop sending state changes to the subscription."""
+        self.subscriptions = tuple(s for s in self.subscriptions if s is not subscription)
+
+    def publish(self, event):
+        """Send an event to every subscription."""
+        for subscription in self.subscriptions:
+            subscription.put(event)
@@ -0,0 +1,303 @@
+"""
+    Fleet of vending machines stored as columns of counts.
+"""
+
+from itertools import repeat
+
+from vending_machine import (ChangeTable, VendingMachine, format_amount, layout_for,
+                             zero_counts)
+
+class Fleet():
+    """
+    Represents the state of many vending machines at once.
+
+    State is stored as one array per coin or product with one entry per
+    machine, instead of one set of dictionaries per machine. Operations are
+    applied to a batch of machines with the same semantics as the matching
+    VendingMachine method.
+    """
+
+    def __init__(self, size, machine_class=VendingMachine):
+        # Number of machines in the fleet.
+        self.size = size
+
+        # Vending machine class whose coins, products and semantics are modelled.
+        self.machine_class = machine_class
+
+        # Current coin inventory.
+        # Key = coin name. Value = quantity for each machine.
+        self.coin_inventory = {coin: self._column() for coin in machine_class.VALID_COINS}
+
+        # Acceptable coins and the number entered by the customer.
+        # Key = coin name. Value = quantity for each machine.
+        self.inserted_coins = {coin: self._column() for coin in machine_class.VALID_COINS}
+
+        # Coin return with number of coins. Rejected coins get a column
+        # the first time they are returned.
+        # Key = coin name. Value = quantity for each machine.
+        self.coin_return = {}
+
+        # Current product inventory.
+        # Key = product name. Value = quantity for each machine.
+        self.product_inventory = {product: self._column() for product in machine_class.PRODUCTS}
+
+        # Monetary amount in cents inserted by the customer for each machine.
+        self.current_amount = self._column()
+
+        # Product dispense bin for each machine.
+        self.product_dispense_bin = [""] * size
+
+        # Custom display message waiting to be shown for each machine.
+        self.messages = [""] * size
+
+        # Total quantity over the fleet.
+        # Key = product name. Value = quantity.
+        self.product_totals = {product: 0 for product in machine_class.PRODUCTS}
+
+        # Total quantity over the fleet.
+        # Key = coin name. Value = quantity.
+        self.coin_totals = {coin: 0 for coin in machine_class.VALID_COINS}
+
+        # Whether each machine needs exact change, and the number that do.
+        # Empty machines cannot make change.
+        self.exact_change = bytearray(b"\1") * size
+        self.exact_change_count = size
+
+        self.layout = layout_for(machine_class)
+
+        # Whether exact change is needed for the coin counts that can take
+        # part in change, as there are only a few of them.
+        # Key = usable count of each coin. Value = True if exact change is needed.
+        self._exact_change_cache = {}
+
+    def _column(self):
+        """Return a new column of zeros with one entry per machine."""
+        return zero_counts(self.size)
+
+    def _machines(self, machines):
+        """Return the machine indices in a batch, or every machine if there is no batch."""
+        if machines is None:
+            return range(self.size)
+
+        return machines
+
+    def _quantities(self, quantity, machines):
+        """Return a quantity for each machine in a batch from one quantity or a sequence."""
+        if isinstance(quantity, int):
+            return repeat(quantity, len(machines))
+
+        if len(quantity) != len(machines):
+            raise ValueError("%d quantities given for %d machines" % (len(quantity), len(machines)))
+
+        return quantity
+
+    def _needs_exact_change(self, usable):
+        """Return True if exact change is needed with the usable count of each coin."""
+        needed = self._exact_change_cache.get(usable)
+        if needed is None:
+            layout = self.layout
+            table = ChangeTable(layout.coin_values, layout.change_limit)
+            for index, count in enumerate(usable):
+                table.set_count(index, count)
+
+            ways = table.ways
+            needed = any(ways[amount] == 0 for amount in layout.exact_change_amounts)
+            self._exact_change_cache[usable] = needed
+
+        return needed
+
+    def _update_exact_change(self, machines):
+        """Work out again whether each machine in the batch needs exact change."""
+        layout = self.layout
+        columns = [(column, layout.change_limit // value)
+                   for column, value in zip(self.coin_inventory.values(), layout.coin_values)]
+        exact_change = self.exact_change
+        for index in machines:
+            usable = tuple(min(column[index], limit) for column, limit in columns)
+            needed = self._needs_exact_change(usable)
+            if needed != exact_change[index]:
+                exact_change[index] = needed
+                self.exact_change_count += 1 if needed else -1
+
+    @classmethod
+    def from_machines(cls, machines):
+        """Build a fleet holding the state of the given vending machines."""
+        machines = list(machines)
+        fleet = cls(len(machines), type(machines[0]) if machines else VendingMachine)
+        for index, machine in enumerate(machines):
+            fleet.load(index, machine)
+
+        return fleet
+
+    def load(self, index, machine):
+        """Copy the state of a vending machine into a row of the fleet."""
+        for coin, column in self.coin_inventory.items():
+            self.coin_totals[coin] += machine.coin_inventory[coin] - column[index]
+            column[index] = machine.coin_inventory[coin]
+        for coin, column in self.inserted_coins.items():
+            column[index] = machine.inserted_coins[coin]
+        for column in self.coin_return.values():
+            column[index] = 0
+        for coin, quantity in machine.coin_return.items():
+            self._coin_return_column(coin)[index] = quantity
+        for product, column in self.product_inventory.items():
+            self.product_totals[product] += machine.product_inventory[product] - column[index]
+            column[index] = machine.product_inventory[product]
+
+        self.current_amount[index] = machine.current_amount
+        self.product_dispense_bin[index] = machine.product_dispense_bin
+        self.messages[index] = machine.display_unit.message
+        self._update_exact_change((index,))
+
+    def machine(self, index):
+        """Return a vending machine holding the state of a row of the fleet."""
+        machine = self.machine_class()
+        for coin, column in self.coin_inventory.items():
+            machine.coin_inventory[coin] = column[index]
+        for coin, column in self.inserted_coins.items():
+            machine.inserted_coins[coin] = column[index]
+        for coin, column in self.coin_return.items():
+            if column[index] > 0:
+                machine.coin_return[coin] = column[index]
+        for product, column in self.product_inventory.items():
+            machine.product_inventory[product] = column[index]
+
+        machine.current_amount = self.current_amount[index]
+        machine.product_dispense_bin = self.product_dispense_bin[index]
+        machine.display_unit.message = self.messages[index]
+        return machine
+
+    def _coin_return_column(self, coin):
+        """Return the coin return column for the coin, adding it if needed."""
+        if coin not in self.coin_return:
+            self.coin_return[coin] = self._column()
+
+        return self.coin_return[coin]
+
+    def insert_coin(self, coin, machines=None):
+        """
+        Insert a coin into each machine in the batch.
+        See VendingMachine.insert_coin().
+
+        Args:
+            coin (str): Name of the coin inserted.
+            machines (iterable): Machine indices. Every machine if None.
+        """
+        machines = self._machines(machines)
+        if coin in self.machine_class.VALID_COINS:
+            value = self.machine_class.VALID_COINS[coin]
+            inserted = self.inserted_coins[coin]
+            current_amount = self.current_amount
+            for index in machines:
+                inserted[index] += 1
+                current_amount[index] += value
+        else:
+            # Place rejected coin in the coin return bin.
+            coin_return = self._coin_return_column(coin)
+            for index in machines:
+                coin_return[index] += 1
+
+    def dispense_product(self, product, machines=None):
+        """
+        Dispense the product from each machine in the batch.
+        See VendingMachine.dispense_product().
+
+        Args:
+            product (str): Name of the product selected.
+            machines (iterable): Machine indices. Every machine if None.
+        """
+        price = self.machine_class.PRODUCTS[product]
+        current_amount = self.current_amount
+        messages = self.messages
+
+        # Split the batch into machines with enough money and those without.
+        paid = []
+        for index in self._machines(machines):
+            if current_amount[index] < price:
+                messages[index] = "PRICE " + format_amount(price)
+            else:
+                paid.append(index)
+
+        # Move the inserted coins into the coin inventory.
+        for coin, inserted in self.inserted_coins.items():
+            inventory = self.coin_inventory[coin]
+            added = 0
+            for index in paid:
+                added += inserted[index]
+                inventory[index] += inserted[index]
+                inserted[index] = 0
+            self.coin_totals[coin] += added
+
+        # Dispense the product and remove it from the product inventory.
+        product_inventory = self.product_inventory[product]
+        product_dispense_bin = self.product_dispense_bin
+        for index in paid:
+            product_dispense_bin[index] = product
+            product_inventory[index] -= 1
+            current_amount[index] -= price
+            messages[index] = "THANK YOU"
+        self.product_totals[product] -= len(paid)
+
+        self._update_exact_change(paid)
+
+    def refill_coins(self, quantities, machines=None):
+        """
+        Add coins to the coin inventory of each machine in the batch.
+        See VendingMachine.refill_coins().
+
+        Args:
+            quantities (dict): Key = coin name. Value = quantity added to
+                every machine, or a sequence of quantities in batch order.
+            machines (iterable): Machine indices. Every machine if None.
+        """
+        machines = list(self._machines(machines))
+        for coin, quantity in quantities.items():
+            column = self.coin_inventory[coin]
+            added = 0
+            for index, count in zip(machines, self._quantities(quantity, machines)):
+                column[index] += count
+                added += count
+            self.coin_totals[coin] += added
+
+        self._update_exact_change(machines)
+
+    def restock(self, quantities, machines=None):
+        """
+        Add products to the product inventory of each machine in the batch.
+        See VendingMachine.restock().
+
+        Args:
+            quantities (dict): Key = product name. Value = quantity added to
+                every machine, or a sequence of quantities in batch order.
+            machines (iterable): Machine indices. Every machine if None.
+        """
+        machines = list(self._machines(machines))
+        for product, quantity in quantities.items():
+            column = self.product_inventory[product]
+            added = 0
+            for index, count in zip(machines, self._quantities(quantity, machines)):
+                column[index] += count
+                added += count
+            self.product_totals[product] += added
+
+    def return_inserted_coins(self, machines=None):
+        """
+        Return the inserted coins from each machine in the batch.
+        See VendingMachine.return_inserted_coins().
+
+        Args:
+            machines (iterable): Machine indices. Every machine if None.
+        """
+        machines = list(self._machines(machines))
+        current_amount = self.current_amount
+        for coin, inserted in self.inserted_coins.items():
+            value = self.machine_class.VALID_COINS[coin]
+            coin_return = None
+            for index in machines:
+                quantity = inserted[index]
+                if quantity > 0:
+                    if coin_return is None:
+                        coin_return = self._coin_return_column(coin)
+                    coin_return[index] += quantity
+                    current_amount[index] -= value * quantity
+                    inserted[index] = 0
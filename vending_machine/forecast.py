@@ -0,0 +1,243 @@
+"""
+    Monte Carlo forecast of when vending machines will need exact change.
+
+    Many random days of customers are simulated for each machine, starting
+    from its current coin and product inventories. Each customer picks a
+    product, pays for it with random coins, the coins go into the coin
+    inventory and change is made by the machine's change strategy, just as
+    dispense_product() followed by make_change() would. The time at which
+    the machine first needs exact change is recorded for each run.
+
+    Runs work on plain counts and a change table instead of a
+    VendingMachine, and machines are forecast across a pool of processes.
+    Every machine's runs are seeded from its machine id, so forecasting in
+    parallel gives the same result as forecasting serially.
+"""
+
+import math
+import random
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+
+from vending_machine import ChangeTable, VendingMachine, change_strategy_for, layout_for
+
+# Demand on a machine: average customers per hour and the relative
+# frequency of each product chosen and each coin paid with.
+# products: Key = product name. Value = weight.
+# coins: Key = accepted coin name. Value = weight.
+Demand = namedtuple("Demand", ["sales_per_hour", "products", "coins"])
+
+# A machine's current inventories, and prices if it does not use the
+# prices of its class.
+MachineState = namedtuple("MachineState", ["machine_id", "coin_inventory", "product_inventory",
+                                           "prices"], defaults=[None])
+
+# Forecast for a machine: hours until exact change was needed for each run
+# that needed it within the horizon in ascending order, the number of runs
+# and the horizon in hours.
+Forecast = namedtuple("Forecast", ["machine_id", "times", "runs", "horizon"])
+
+def machine_state(machine_id, machine):
+    """Return the MachineState of a vending machine."""
+    return MachineState(machine_id, dict(machine.coin_inventory),
+                        dict(machine.product_inventory), dict(machine.prices))
+
+def customers(demand, prices, valid_coins, rng):
+    """
+    Generate random customers.
+
+    Yields:
+        Tuple of the hour the customer arrives, the product chosen and the
+        coins inserted, which are random coins until the price is covered.
+    """
+    products = list(demand.products)
+    product_weights = list(accumulate(demand.products.values()))
+    product_total = product_weights[-1]
+    coins = list(demand.coins)
+    coin_weights = list(accumulate(demand.coins.values()))
+    coin_total = coin_weights[-1]
+    values = [valid_coins[coin] for coin in coins]
+
+    # Sample by bisecting the cumulative weights directly, which is the
+    # same as random.choices() without its overhead on every draw.
+    uniform = rng.random
+    expovariate = rng.expovariate
+    rate = demand.sales_per_hour
+
+    time = 0.0
+    while True:
+        time += expovariate(rate)
+        product = products[bisect_right(product_weights, uniform() * product_total)]
+        price = prices[product]
+
+        paid = []
+        amount = 0
+        while amount < price:
+            index = bisect_right(coin_weights, uniform() * coin_total)
+            paid.append(coins[index])
+            amount += values[index]
+
+        yield time, product, paid
+
+def _needs_exact_change(change_table, exact_change_amounts):
+    """Return True if the change table cannot make one of the exact change amounts."""
+    ways = change_table.ways
+    for amount in exact_change_amounts:
+        if ways[amount] == 0:
+            return True
+
+    return False
+
+def simulate(state, demand, horizon, rng, machine_class=VendingMachine):
+    """
+    Simulate one run of customers on a machine.
+
+    Customers wanting a product that has run out buy nothing. Change that
+    cannot be made is kept by the machine.
+
+    Args:
+        state (MachineState): Starting inventories of the machine.
+        demand (Demand): Demand on the machine.
+        horizon (float): Hours to simulate.
+        rng (random.Random): Source of randomness for the run.
+        machine_class (class): Vending machine class modelled.
+
+    Returns:
+        Hours until exact change was needed, or None if it was not needed
+        within the horizon.
+    """
+    valid_coins = machine_class.VALID_COINS
+    prices = state.prices or machine_class.PRODUCTS
+    layout = layout_for(machine_class, prices)
+    coin_index = layout.coin_index
+    exact_change_amounts = layout.exact_change_amounts
+    change_strategy = change_strategy_for(valid_coins)
+
+    coin_inventory = dict.fromkeys(valid_coins, 0)
+    coin_inventory.update(state.coin_inventory)
+    product_inventory = dict.fromkeys(prices, 0)
+    product_inventory.update(state.product_inventory)
+    stocked = sum(1 for quantity in product_inventory.values() if quantity > 0)
+
+    change_table = ChangeTable(layout.coin_values, layout.change_limit)
+    for coin, quantity in coin_inventory.items():
+        change_table.set_count(coin_index[coin], quantity)
+
+    if _needs_exact_change(change_table, exact_change_amounts):
+        return 0.0
+
+    for time, product, paid in customers(demand, prices, valid_coins, rng):
+        if time > horizon or stocked == 0:
+            return None
+
+        if product_inventory[product] <= 0:
+            continue
+
+        product_inventory[product] -= 1
+        if product_inventory[product] == 0:
+            stocked -= 1
+
+        # Move the inserted coins into the coin inventory.
+        amount = 0
+        for coin in paid:
+            coin_inventory[coin] += 1
+            amount += valid_coins[coin]
+        for coin in set(paid):
+            change_table.set_count(coin_index[coin], coin_inventory[coin])
+
+        change = amount - prices[product]
+        if change > 0 and change_table.can_make(change):
+            for coin, quantity in change_strategy.make_change(change, coin_inventory).items():
+                coin_inventory[coin] -= quantity
+                change_table.set_count(coin_index[coin], coin_inventory[coin])
+
+        if _needs_exact_change(change_table, exact_change_amounts):
+            return time
+
+def forecast(state, demand, runs=200, horizon=24.0, seed=0, machine_class=VendingMachine):
+    """
+    Forecast when a machine will need exact change.
+
+    Args:
+        state (MachineState): Current inventories of the machine.
+        demand (Demand): Demand on the machine.
+        runs (int): Number of runs simulated.
+        horizon (float): Hours simulated by each run.
+        seed (int): Seed combined with the machine id for the runs.
+        machine_class (class): Vending machine class modelled.
+
+    Returns:
+        Forecast of the machine.
+    """
+    rng = random.Random("%s:%s" % (seed, state.machine_id))
+    times = []
+    for _ in range(runs):
+        time = simulate(state, demand, horizon, rng, machine_class)
+        if time is not None:
+            times.append(time)
+
+    times.sort()
+    return Forecast(state.machine_id, times, runs, horizon)
+
+def _forecast_shard(shard, demand, runs, horizon, seed, machine_class):
+    """Forecast a shard of machines in a worker process."""
+    return [forecast(state, demand[state.machine_id] if isinstance(demand, dict) else demand,
+                     runs, horizon, seed, machine_class)
+            for state in shard]
+
+def forecast_fleet(states, demand, runs=200, horizon=24.0, seed=0, processes=None,
+                   shard_size=16, machine_class=VendingMachine):
+    """
+    Forecast when each machine of a fleet will need exact change, across a
+    pool of worker processes.
+
+    Args:
+        states (iterable): MachineState for each machine.
+        demand (Demand or dict): Demand on every machine, or the demand on
+            each machine keyed by machine id.
+        runs (int): Number of runs simulated for each machine.
+        horizon (float): Hours simulated by each run.
+        seed (int): Seed combined with each machine id for its runs.
+        processes (int): Number of worker processes. One forecasts serially
+            in this process. The number of CPUs if None.
+        shard_size (int): Number of machines sent to a worker at a time.
+        machine_class (class): Vending machine class modelled.
+
+    Returns:
+        List of Forecast in the order of the machine states.
+    """
+    states = list(states)
+    shards = [states[start:start + shard_size] for start in range(0, len(states), shard_size)]
+    if processes == 1:
+        return [result for shard in shards
+                for result in _forecast_shard(shard, demand, runs, horizon, seed, machine_class)]
+
+    forecasts = []
+    with ProcessPoolExecutor(processes) as executor:
+        count = len(shards)
+        for shard_forecasts in executor.map(_forecast_shard, shards, [demand] * count,
+                                            [runs] * count, [horizon] * count,
+                                            [seed] * count, [machine_class] * count):
+            forecasts.extend(shard_forecasts)
+
+    return forecasts
+
+def shortage_probability(result, hours=None):
+    """Return the fraction of runs that needed exact change within the hours, or the horizon."""
+    if hours is None:
+        return len(result.times) / result.runs
+
+    return bisect_right(result.times, hours) / result.runs
+
+def shortage_quantile(result, fraction):
+    """
+    Return the hours within which the fraction of runs needed exact change,
+    or None if fewer runs needed it within the horizon.
+    """
+    needed = max(1, math.ceil(fraction * result.runs))
+    if needed > len(result.times):
+        return None
+
+    return result.times[needed - 1]
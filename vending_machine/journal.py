@@ -0,0 +1,185 @@
+"""
+    Append-only journal of vending machine events with snapshots.
+
+    The journal file is a sequence of fixed size binary records, one per
+    event. Every so often the coin inventory, inserted coins and product
+    inventory are written to a separate snapshot file together with the
+    position in the journal at which the snapshot was taken. Recovery loads
+    the snapshot and replays only the journal records after it.
+
+    Coins and products are recorded by their position in the machine
+    layout, so a journal must be recovered with the same vending machine
+    class that wrote it. The coin return belongs to the customer in front of
+    the machine and is not recovered. The current amount is recovered as
+    the value of the inserted coins.
+"""
+
+import os
+import struct
+
+import vending_machine as vm
+
+# Event type codes used in journal records.
+EVENT_CODES = {vm.COIN_ACCEPTED : 1,
+               vm.COIN_REJECTED : 2,
+               vm.PRODUCT_DISPENSED : 3,
+               vm.CHANGE_RETURNED : 4,
+               vm.COINS_RETURNED : 5,
+               vm.PRODUCT_RESTOCKED : 6,
+               vm.COINS_REFILLED : 7}
+
+# Journal record: event code, coin or product position, quantity.
+RECORD = struct.Struct("<BHi")
+
+# Position recorded for coins that are not in the machine layout.
+UNKNOWN = 0xFFFF
+
+# Snapshot header: file marker and the journal position of the snapshot.
+SNAPSHOT_HEADER = struct.Struct("<4sQ")
+SNAPSHOT_MARKER = b"VMSS"
+
+class Journal():
+    """
+    Observer that records the events of a vending machine in a journal file.
+
+    Each record is written to the file as soon as it is made, so records
+    survive the process crashing.
+
+    Args:
+        path (str): Journal file. The snapshot is kept next to it in path + ".snapshot".
+        snapshot_interval (int): Number of events between snapshots.
+        sync (bool): True to also sync each record to disk, so records
+            survive the operating system crashing or losing power.
+    """
+
+    def __init__(self, path, snapshot_interval=1000, sync=False):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.snapshot_interval = snapshot_interval
+        self.sync = sync
+
+        # Events recorded since the last snapshot.
+        self.pending = 0
+
+        # Unbuffered, so each record reaches the file when it is written.
+        self.file = open(path, "ab", buffering=0)
+
+    def __call__(self, machine, event, name, quantity):
+        """Record an event. Called by the vending machine the journal observes."""
+        layout = machine.layout
+        if event in (vm.PRODUCT_DISPENSED, vm.PRODUCT_RESTOCKED):
+            index = layout.product_index[name]
+        else:
+            index = layout.coin_index.get(name, UNKNOWN)
+
+        self.file.write(RECORD.pack(EVENT_CODES[event], index, quantity))
+        if self.sync:
+            os.fsync(self.file.fileno())
+
+        self.pending += 1
+        if self.pending >= self.snapshot_interval:
+            self.snapshot(machine)
+
+    def attach(self, machine):
+        """Start recording the events of the machine, beginning with a snapshot."""
+        self.snapshot(machine)
+        machine.add_observer(self)
+
+    def snapshot(self, machine):
+        """
+        Write the machine's inventories to the snapshot file. Should also be
+        called after the inventories are changed directly instead of through
+        restock() or refill_coins().
+        """
+        self.file.flush()
+        position = self.file.tell()
+
+        counts = (list(machine.coin_inventory.counts)
+                  + list(machine.inserted_coins.counts)
+                  + list(machine.product_inventory.counts))
+
+        # Write the snapshot beside the old one and swap it in so that a
+        # crash part way through leaves the old snapshot intact.
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MARKER, position))
+            snapshot_file.write(struct.pack("<%dq" % len(counts), *counts))
+        os.replace(tmp_path, self.snapshot_path)
+
+        self.pending = 0
+
+    def flush(self):
+        """Write buffered records to the journal file."""
+        self.file.flush()
+
+    def close(self):
+        """Flush and close the journal file."""
+        self.file.close()
+
+def recover(path, machine_class=vm.VendingMachine, catalog=None):
+    """
+    Rebuild a vending machine from a journal.
+
+    Args:
+        path (str): Journal file written by a Journal.
+        machine_class (class): Vending machine class that wrote the journal.
+        catalog (Catalog): Catalog of the machine that wrote the journal, if any.
+
+    Returns:
+        A new vending machine holding the recovered inventories.
+    """
+    machine = machine_class(catalog=catalog)
+    layout = machine.layout
+    coin_count = len(layout.coin_index)
+    product_count = len(layout.product_index)
+
+    position = 0
+    snapshot_path = path + ".snapshot"
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, "rb") as snapshot_file:
+            marker, position = SNAPSHOT_HEADER.unpack(snapshot_file.read(SNAPSHOT_HEADER.size))
+            if marker != SNAPSHOT_MARKER:
+                raise ValueError("%s is not a vending machine snapshot" % snapshot_path)
+
+            total = 2 * coin_count + product_count
+            counts = struct.unpack("<%dq" % total, snapshot_file.read(8 * total))
+
+        for index, coin in enumerate(layout.coin_index):
+            machine.coin_inventory[coin] = counts[index]
+            machine.inserted_coins[coin] = counts[coin_count + index]
+        for index, product in enumerate(layout.product_index):
+            machine.product_inventory[product] = counts[2 * coin_count + index]
+
+    with open(path, "rb") as journal_file:
+        journal_file.seek(position)
+        tail = journal_file.read()
+
+    # Ignore a partly written record at the end of the journal.
+    tail = tail[:len(tail) - len(tail) % RECORD.size]
+
+    coins = list(layout.coin_index)
+    inserted = machine.inserted_coins.counts
+    for code, index, quantity in RECORD.iter_unpack(tail):
+        if code == EVENT_CODES[vm.COIN_ACCEPTED]:
+            inserted[index] += quantity
+        elif code == EVENT_CODES[vm.PRODUCT_DISPENSED]:
+            # The inserted coins are moved into the coin inventory.
+            for coin_index, coin in enumerate(coins):
+                if inserted[coin_index] > 0:
+                    machine.coin_inventory[coin] += inserted[coin_index]
+                    inserted[coin_index] = 0
+            machine.product_inventory.counts[index] -= quantity
+        elif code == EVENT_CODES[vm.CHANGE_RETURNED]:
+            machine.coin_inventory[coins[index]] -= quantity
+        elif code == EVENT_CODES[vm.COINS_RETURNED]:
+            inserted[index] -= quantity
+        elif code == EVENT_CODES[vm.PRODUCT_RESTOCKED]:
+            machine.product_inventory.counts[index] += quantity
+        elif code == EVENT_CODES[vm.COINS_REFILLED]:
+            machine.coin_inventory[coins[index]] += quantity
+
+    # The customer is credited with the inserted coins that were recovered.
+    machine.current_amount = sum(value * quantity
+                                 for value, quantity in zip(layout.coin_values, inserted))
+
+    return machine
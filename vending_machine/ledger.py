@@ -0,0 +1,175 @@
+"""
+    Sales ledger of vending machines rolled up into time buckets.
+
+    A SalesLedger observes vending machines and adds each sale and each coin
+    paid out as change to the rollup of the current time bucket, i.e. the
+    current hour. Only the most recent buckets are kept, in a ring, so the
+    ledger's memory does not grow with the number of events or with time.
+    Ledgers of different machines are merged by adding their rollups bucket
+    by bucket.
+"""
+
+import time
+from collections import namedtuple
+
+import vending_machine as vm
+
+# Totals of a time bucket or a range of buckets.
+# sales: Key = product name. Value = quantity sold.
+# revenue: Key = product name. Value = cents.
+# change: Key = coin name. Value = quantity paid out as change.
+# change_paid: Cents paid out as change.
+Rollup = namedtuple("Rollup", ["sales", "revenue", "change", "change_paid"])
+
+class Bucket():
+    """Running totals of one time bucket."""
+
+    __slots__ = ("number", "sales", "revenue", "change", "change_paid")
+
+    def __init__(self, number):
+        # Start of the bucket in seconds divided by the bucket width.
+        self.number = number
+
+        # See Rollup.
+        self.sales = {}
+        self.revenue = {}
+        self.change = {}
+        self.change_paid = 0
+
+    def add(self, other):
+        """Add the totals of another bucket."""
+        vm.add_counts(self.sales, other.sales)
+        vm.add_counts(self.revenue, other.revenue)
+        vm.add_counts(self.change, other.change)
+        self.change_paid += other.change_paid
+
+    def rollup(self):
+        """Return a copy of the totals as a Rollup."""
+        return Rollup(dict(self.sales), dict(self.revenue), dict(self.change), self.change_paid)
+
+class SalesLedger():
+    """
+    Observer that rolls up the sales and change of vending machines into
+    time buckets.
+
+    Args:
+        bucket_seconds (int): Width of a time bucket in seconds.
+        buckets (int): Number of most recent buckets kept.
+        clock (function): Returns the current time in seconds.
+    """
+
+    def __init__(self, bucket_seconds=3600, buckets=168, clock=time.time):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+
+        # Ring of buckets. A bucket is kept in the slot of its number modulo
+        # the number of slots, replacing the older bucket that was there.
+        self.ring = [None] * buckets
+
+        # Number of the newest bucket written.
+        self.newest = None
+
+    def attach(self, machine):
+        """Start recording the sales and change of the machine."""
+        machine.add_observer(self)
+
+    def detach(self, machine):
+        """Stop recording the sales and change of the machine."""
+        machine.remove_observer(self)
+
+    def _bucket(self, number):
+        """
+        Return the bucket with the number, replacing the bucket in its slot if
+        that one is older. None if the bucket is older than the ring holds.
+        """
+        if self.newest is not None and number <= self.newest - len(self.ring):
+            return None
+
+        slot = number % len(self.ring)
+        bucket = self.ring[slot]
+        if bucket is None or bucket.number < number:
+            bucket = self.ring[slot] = Bucket(number)
+            if self.newest is None or number > self.newest:
+                self.newest = number
+
+        return bucket
+
+    def __call__(self, machine, event, name, quantity):
+        """Record a machine event. Called by the vending machines observed."""
+        if event != vm.PRODUCT_DISPENSED and event != vm.CHANGE_RETURNED:
+            return
+
+        bucket = self._bucket(int(self.clock() // self.bucket_seconds))
+        if bucket is None:
+            # The clock went back further than the ring holds.
+            return
+
+        if event == vm.PRODUCT_DISPENSED:
+            bucket.sales[name] = bucket.sales.get(name, 0) + quantity
+            bucket.revenue[name] = bucket.revenue.get(name, 0) + machine.prices[name] * quantity
+        else:
+            bucket.change[name] = bucket.change.get(name, 0) + quantity
+            bucket.change_paid += machine.VALID_COINS[name] * quantity
+
+    def buckets(self):
+        """
+        Return the buckets kept, oldest first.
+
+        Returns:
+            List of tuples of the bucket start in seconds and its Rollup.
+        """
+        if self.newest is None:
+            return []
+
+        oldest = self.newest - len(self.ring)
+        kept = sorted((bucket for bucket in self.ring
+                       if bucket is not None and bucket.number > oldest),
+                      key=lambda bucket: bucket.number)
+        return [(bucket.number * self.bucket_seconds, bucket.rollup()) for bucket in kept]
+
+    def rollup(self, start=None, end=None):
+        """
+        Return the totals of the buckets kept that start within a range of
+        time in seconds, or of every bucket kept.
+
+        Args:
+            start (float): Earliest bucket start included. None for no limit.
+            end (float): Bucket starts before this are included. None for no limit.
+        """
+        total = Bucket(None)
+        for bucket_start, rollup in self.buckets():
+            if (start is None or bucket_start >= start) and (end is None or bucket_start < end):
+                total.add(rollup)
+
+        return total.rollup()
+
+    @classmethod
+    def merge(cls, ledgers):
+        """
+        Return a new ledger holding the bucket by bucket totals of the
+        ledgers, i.e. those of every machine in a fleet. The ledgers must
+        have the same bucket width. The new ledger keeps as many buckets as
+        the largest ledger, counting back from the newest bucket of any of
+        them.
+        """
+        ledgers = list(ledgers)
+        widths = set(ledger.bucket_seconds for ledger in ledgers)
+        if len(widths) > 1:
+            raise ValueError("Ledgers with different bucket widths cannot be merged")
+
+        merged = cls(widths.pop() if widths else 3600,
+                     max((len(ledger.ring) for ledger in ledgers), default=168),
+                     ledgers[0].clock if ledgers else time.time)
+
+        newest = [ledger.newest for ledger in ledgers if ledger.newest is not None]
+        if newest:
+            merged.newest = max(newest)
+
+        for ledger in ledgers:
+            for bucket in ledger.ring:
+                if bucket is not None and bucket.number > ledger.newest - len(ledger.ring):
+                    target = merged._bucket(bucket.number)
+                    if target is not None:
+                        target.add(bucket)
+
+        return merged
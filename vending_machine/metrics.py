@@ -0,0 +1,173 @@
+"""
+    Opt-in operation counters and latency histograms for vending machines.
+
+    instrument() switches a vending machine to an instrumented subclass of
+    its own class whose hot path methods record into a Metrics object, and
+    uninstrument() switches it back. Machines that are not instrumented run
+    the original methods, so metrics cost nothing while disabled.
+"""
+
+import json
+from bisect import bisect_left
+from time import perf_counter_ns
+
+# Operations whose latency is recorded.
+OPERATIONS = ("insert_coin", "insert_coins", "dispense_product", "make_change", "exact_change_only", "display")
+
+# Upper bounds of the latency histogram buckets in nanoseconds.
+BUCKETS = (250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 1000000)
+
+class Metrics():
+    """
+    Operation counters and latency histograms. One Metrics object can be
+    shared by many machines to aggregate over a fleet.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        # Upper bounds of the latency buckets in nanoseconds.
+        self.buckets = buckets
+
+        # Event counters, i.e. coins rejected.
+        # Key = counter name. Value = count.
+        self.counters = {}
+
+        # Latency histograms. The last bucket counts latencies above the
+        # largest bound.
+        # Key = operation name. Value = count per bucket.
+        self.histograms = {}
+
+        # Total latency in nanoseconds.
+        # Key = operation name. Value = nanoseconds.
+        self.totals = {}
+
+    def increment(self, counter, amount=1):
+        """Add to an event counter."""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def observe(self, operation, nanoseconds):
+        """Record the latency of an operation."""
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = self.histograms[operation] = [0] * (len(self.buckets) + 1)
+            self.totals[operation] = 0
+
+        histogram[bisect_left(self.buckets, nanoseconds)] += 1
+        self.totals[operation] += nanoseconds
+
+    def count(self, operation):
+        """Return the number of times the operation was recorded."""
+        return sum(self.histograms.get(operation, ()))
+
+    def to_dict(self):
+        """Return the metrics as plain data."""
+        return {"counters" : dict(self.counters),
+                "operations" : {operation : {"count" : sum(histogram),
+                                             "total_ns" : self.totals[operation],
+                                             "buckets_ns" : list(self.buckets),
+                                             "histogram" : list(histogram)}
+                                for operation, histogram in self.histograms.items()}}
+
+    def export_json(self):
+        """Return the metrics as a JSON document."""
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def export_prometheus(self, prefix="vending_machine"):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+        for counter, value in sorted(self.counters.items()):
+            name = "%s_%s_total" % (prefix, counter)
+            lines.append("# TYPE %s counter" % name)
+            lines.append("%s %d" % (name, value))
+
+        name = "%s_operation_seconds" % prefix
+        lines.append("# TYPE %s histogram" % name)
+        for operation, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram):
+                cumulative += count
+                lines.append('%s_bucket{operation="%s",le="%g"} %d'
+                             % (name, operation, bound / 1e9, cumulative))
+            cumulative += histogram[-1]
+            lines.append('%s_bucket{operation="%s",le="+Inf"} %d' % (name, operation, cumulative))
+            lines.append('%s_sum{operation="%s"} %.9f' % (name, operation, self.totals[operation] / 1e9))
+            lines.append('%s_count{operation="%s"} %d' % (name, operation, cumulative))
+
+        return "\n".join(lines) + "\n"
+
+def _timed(operation, method):
+    """Return a method that records the latency of the original method."""
+    def timed(self, *args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.metrics.observe(operation, perf_counter_ns() - start)
+
+    timed.__name__ = method.__name__
+    timed.__doc__ = method.__doc__
+    return timed
+
+# Instrumented subclasses already built.
+# Key = vending machine class. Value = instrumented subclass.
+_instrumented = {}
+
+def instrumented_class(machine_class):
+    """Return the instrumented subclass of a vending machine class."""
+    if machine_class in _instrumented.values():
+        return machine_class
+
+    if machine_class not in _instrumented:
+        namespace = {"__slots__" : (), "uninstrumented_class" : machine_class}
+        for operation in OPERATIONS:
+            attribute = getattr(machine_class, operation)
+            if isinstance(attribute, property):
+                namespace[operation] = property(_timed(operation, attribute.fget), attribute.fset)
+            else:
+                namespace[operation] = _timed(operation, attribute)
+
+        timed_insert_coin = namespace["insert_coin"]
+
+        def insert_coin(self, coin):
+            timed_insert_coin(self, coin)
+            if not self.is_valid_coin(coin):
+                self.metrics.increment("coins_rejected")
+        insert_coin.__doc__ = timed_insert_coin.__doc__
+        namespace["insert_coin"] = insert_coin
+
+        timed_insert_coins = namespace["insert_coins"]
+
+        def insert_coins(self, codes):
+            accepted = timed_insert_coins(self, codes)
+            if accepted < len(codes):
+                self.metrics.increment("coins_rejected", len(codes) - accepted)
+            return accepted
+        insert_coins.__doc__ = timed_insert_coins.__doc__
+        namespace["insert_coins"] = insert_coins
+
+        _instrumented[machine_class] = type("Instrumented" + machine_class.__name__,
+                                            (machine_class,), namespace)
+
+    return _instrumented[machine_class]
+
+def instrument(machine, metrics=None):
+    """
+    Start recording metrics for a vending machine.
+
+    Args:
+        machine (VendingMachine): Machine to instrument.
+        metrics (Metrics): Where to record. A new Metrics object if None.
+
+    Returns:
+        The Metrics object recorded into.
+    """
+    if metrics is None:
+        metrics = Metrics()
+
+    machine.metrics = metrics
+    machine.__class__ = instrumented_class(type(machine))
+    return metrics
+
+def uninstrument(machine):
+    """Stop recording metrics for a vending machine."""
+    machine.__class__ = getattr(type(machine), "uninstrumented_class", type(machine))
+    machine.metrics = None
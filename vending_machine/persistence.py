@@ -0,0 +1,232 @@
+"""
+    Persistence of vending machine state with batched writes.
+
+    A Persistence object observes vending machines and keeps their coin
+    inventory, product inventory and sales counters in a storage backend.
+    Machines changed by an event are marked dirty, and dirty machines are
+    written to the backend together once enough events have been seen or
+    enough time has passed since the last write. Inserted coins belong to
+    the customer and are not persisted, so inserting a coin never costs a
+    write.
+
+    Backends have load(), write() and close() methods. MemoryBackend keeps
+    records in a dictionary and SQLiteBackend keeps them in a SQLite
+    database, writing each batch in a single transaction.
+"""
+
+import sqlite3
+import time
+from collections import namedtuple
+
+import vending_machine as vm
+
+# Persisted state of a machine: coin and product inventories, quantity
+# sold of each product and revenue in cents.
+MachineRecord = namedtuple("MachineRecord", ["coin_inventory", "product_inventory", "sales", "revenue"])
+
+# Events that change the persisted state of a machine.
+PERSISTED_EVENTS = frozenset((vm.PRODUCT_DISPENSED, vm.CHANGE_RETURNED,
+                              vm.PRODUCT_RESTOCKED, vm.COINS_REFILLED))
+
+class MemoryBackend():
+    """Backend keeping machine records in memory."""
+
+    def __init__(self):
+        # Key = machine id. Value = machine record.
+        self.records = {}
+
+        # Number of batches written.
+        self.writes = 0
+
+    def load(self, machine_id):
+        """Return the record of the machine, or None if it has none."""
+        return self.records.get(machine_id)
+
+    def write(self, records):
+        """Store a batch of machine records keyed by machine id."""
+        self.records.update(records)
+        self.writes += 1
+
+    def close(self):
+        """Nothing to release."""
+
+class SQLiteBackend():
+    """
+    Backend keeping machine records in a SQLite database. Each batch is
+    written in one transaction, so a batch is stored completely or not at
+    all.
+
+    Args:
+        path (str): Database file, or ":memory:".
+    """
+
+    # Kinds of quantity stored for a machine.
+    COIN = "coin"
+    PRODUCT = "product"
+    SALES = "sales"
+    REVENUE = "revenue"
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS machine_state ("
+                " machine_id TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " quantity INTEGER NOT NULL,"
+                " PRIMARY KEY (machine_id, kind, name))")
+
+    def load(self, machine_id):
+        """Return the record of the machine, or None if it has none."""
+        rows = self.connection.execute(
+            "SELECT kind, name, quantity FROM machine_state WHERE machine_id = ?",
+            (str(machine_id),)).fetchall()
+        if not rows:
+            return None
+
+        quantities = {self.COIN : {}, self.PRODUCT : {}, self.SALES : {}, self.REVENUE : {}}
+        for kind, name, quantity in rows:
+            quantities[kind][name] = quantity
+
+        return MachineRecord(quantities[self.COIN], quantities[self.PRODUCT],
+                             quantities[self.SALES], quantities[self.REVENUE].get("", 0))
+
+    def write(self, records):
+        """Store a batch of machine records keyed by machine id in one transaction."""
+        rows = []
+        for machine_id, record in records.items():
+            machine_id = str(machine_id)
+            for kind, quantities in ((self.COIN, record.coin_inventory),
+                                     (self.PRODUCT, record.product_inventory),
+                                     (self.SALES, record.sales)):
+                rows.extend((machine_id, kind, name, quantity)
+                            for name, quantity in quantities.items())
+            rows.append((machine_id, self.REVENUE, "", record.revenue))
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO machine_state (machine_id, kind, name, quantity)"
+                " VALUES (?, ?, ?, ?)", rows)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+class Persistence():
+    """
+    Observer that persists the state of vending machines to a backend.
+
+    Dirty machines are written once batch_size persisted events have been
+    seen or interval seconds have passed since the last write, whichever is
+    first. The interval is checked when events arrive; call flush() to
+    write straight away, i.e. before shutting down.
+
+    Args:
+        backend: MemoryBackend, SQLiteBackend or another object with the
+            same methods.
+        batch_size (int): Events that cause a write.
+        interval (float): Seconds after which an event causes a write.
+        clock (function): Returns the current time in seconds.
+    """
+
+    def __init__(self, backend, batch_size=100, interval=1.0, clock=time.monotonic):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.interval = interval
+        self.clock = clock
+
+        # Machines attached.
+        # Key = machine id. Value = vending machine.
+        self.machines = {}
+
+        # Machine id of each machine attached, by the machine's id().
+        self.machine_ids = {}
+
+        # Quantity sold of each product.
+        # Key = machine id. Value = dictionary of product name and quantity.
+        self.sales = {}
+
+        # Revenue in cents.
+        # Key = machine id. Value = cents.
+        self.revenue = {}
+
+        # Machine ids changed since the last write.
+        self.dirty = set()
+
+        # Persisted events since the last write.
+        self.pending = 0
+
+        # Time of the last write.
+        self.written = clock()
+
+    def attach(self, machine, machine_id):
+        """
+        Start persisting the machine under the machine id. If the backend
+        holds a record for the machine id, the machine's inventories and
+        sales counters are restored from it; otherwise the machine's current
+        state is written with the next batch.
+        """
+        record = self.backend.load(machine_id)
+        if record is not None:
+            for coin, quantity in record.coin_inventory.items():
+                machine.coin_inventory[coin] = quantity
+            for product, quantity in record.product_inventory.items():
+                machine.product_inventory[product] = quantity
+            self.sales[machine_id] = dict(record.sales)
+            self.revenue[machine_id] = record.revenue
+        else:
+            self.sales[machine_id] = {}
+            self.revenue[machine_id] = 0
+            self.dirty.add(machine_id)
+
+        self.machines[machine_id] = machine
+        self.machine_ids[id(machine)] = machine_id
+        machine.add_observer(self)
+
+    def detach(self, machine_id):
+        """Write the machine if it is dirty and stop persisting it."""
+        if machine_id in self.dirty:
+            self.flush()
+
+        machine = self.machines.pop(machine_id)
+        del self.machine_ids[id(machine)]
+        del self.sales[machine_id]
+        del self.revenue[machine_id]
+        machine.remove_observer(self)
+
+    def __call__(self, machine, event, name, quantity):
+        """Note a machine event. Called by the vending machines observed."""
+        if event not in PERSISTED_EVENTS:
+            return
+
+        machine_id = self.machine_ids[id(machine)]
+        if event == vm.PRODUCT_DISPENSED:
+            sales = self.sales[machine_id]
+            sales[name] = sales.get(name, 0) + quantity
+            self.revenue[machine_id] += machine.prices[name] * quantity
+
+        self.dirty.add(machine_id)
+        self.pending += 1
+        if self.pending >= self.batch_size or self.clock() - self.written >= self.interval:
+            self.flush()
+
+    def record(self, machine_id):
+        """Return the current record of an attached machine."""
+        machine = self.machines[machine_id]
+        return MachineRecord(dict(machine.coin_inventory), dict(machine.product_inventory),
+                             dict(self.sales[machine_id]), self.revenue[machine_id])
+
+    def flush(self):
+        """Write every dirty machine to the backend."""
+        if self.dirty:
+            self.backend.write({machine_id: self.record(machine_id) for machine_id in self.dirty})
+            self.dirty.clear()
+
+        self.pending = 0
+        self.written = self.clock()
+
+    def close(self):
+        """Write every dirty machine and close the backend."""
+        self.flush()
+        self.backend.close()
@@ -0,0 +1,111 @@
+"""
+    Replay of machine transaction logs across a pool of processes.
+
+    Each machine log is replayed on its own VendingMachine with
+    process_transactions(). Workers send back only a compact summary of
+    each machine, and the summaries are merged into fleet totals in the
+    parent. Replaying in parallel gives the same summaries as replaying
+    serially.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from vending_machine import VendingMachine, add_counts
+
+# A machine's day: its id, the coin and product inventories at the start
+# and the customer sessions in order.
+MachineLog = namedtuple("MachineLog", ["machine_id", "coin_inventory", "product_inventory", "sessions"])
+
+# Result of replaying a machine log: final inventories, quantity dispensed
+# of each product, cents returned as change and cents of inserted coins
+# returned.
+MachineSummary = namedtuple("MachineSummary", ["machine_id", "coin_inventory", "product_inventory",
+                                               "dispensed", "change", "refund", "sessions"])
+
+# Totals over many machine summaries.
+FleetSummary = namedtuple("FleetSummary", ["machines", "coin_inventory", "product_inventory",
+                                           "dispensed", "change", "refund", "sessions"])
+
+def replay_log(log, machine_class=VendingMachine):
+    """
+    Replay a machine log on a new vending machine.
+
+    Args:
+        log (MachineLog): Machine log to replay.
+        machine_class (class): Vending machine class to replay on.
+
+    Returns:
+        MachineSummary of the replay.
+    """
+    machine = machine_class()
+    for coin, quantity in log.coin_inventory.items():
+        machine.coin_inventory[coin] = quantity
+    for product, quantity in log.product_inventory.items():
+        machine.product_inventory[product] = quantity
+
+    dispensed = {}
+    change = 0
+    refund = 0
+    sessions = 0
+    for result in machine.process_transactions(log.sessions):
+        if result.dispensed:
+            dispensed[result.dispensed] = dispensed.get(result.dispensed, 0) + 1
+        change += result.change
+        refund += result.refund
+        sessions += 1
+
+    return MachineSummary(log.machine_id,
+                          dict(machine.coin_inventory),
+                          dict(machine.product_inventory),
+                          dispensed, change, refund, sessions)
+
+def _replay_shard(shard, machine_class):
+    """Replay a shard of machine logs in a worker process."""
+    return [replay_log(log, machine_class) for log in shard]
+
+def replay_logs(logs, processes=None, shard_size=64, machine_class=VendingMachine):
+    """
+    Replay machine logs across a pool of worker processes.
+
+    Args:
+        logs (iterable): MachineLog for each machine.
+        processes (int): Number of worker processes. One replays serially
+            in this process. The number of CPUs if None.
+        shard_size (int): Number of machine logs sent to a worker at a time.
+        machine_class (class): Vending machine class to replay on.
+
+    Returns:
+        List of MachineSummary in the order of the logs.
+    """
+    if processes == 1:
+        return [replay_log(log, machine_class) for log in logs]
+
+    logs = list(logs)
+    shards = [logs[start:start + shard_size] for start in range(0, len(logs), shard_size)]
+    summaries = []
+    with ProcessPoolExecutor(processes) as executor:
+        for shard_summaries in executor.map(_replay_shard, shards, [machine_class] * len(shards)):
+            summaries.extend(shard_summaries)
+
+    return summaries
+
+def merge(summaries):
+    """Return the FleetSummary totals of machine summaries."""
+    coin_inventory = {}
+    product_inventory = {}
+    dispensed = {}
+    change = 0
+    refund = 0
+    sessions = 0
+    machines = 0
+    for summary in summaries:
+        add_counts(coin_inventory, summary.coin_inventory)
+        add_counts(product_inventory, summary.product_inventory)
+        add_counts(dispensed, summary.dispensed)
+        change += summary.change
+        refund += summary.refund
+        sessions += summary.sessions
+        machines += 1
+
+    return FleetSummary(machines, coin_inventory, product_inventory, dispensed, change, refund, sessions)
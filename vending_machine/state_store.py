@@ -0,0 +1,225 @@
+"""
+    Memory-mapped file holding the state of a fleet of vending machines.
+
+    File layout, all integers are 64 bit in native byte order:
+
+        header     marker "VMFS", version, byte order, machine count,
+                   coin count, product count and the size of the names
+        names      coin and product names, one per line, padded to 8 bytes
+        columns    one column of machine count integers for each coin of
+                   the coin inventory, each coin of the inserted coins,
+                   each product of the product inventory and the current
+                   amount
+
+    Opening a store only maps the file and reads the header, so it takes the
+    same time whatever the size of the fleet. Machines are built from their
+    row the first time they are accessed, and the columns can be read for
+    fleet-wide reporting without copying.
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+from vending_machine import VendingMachine
+
+# Fields of the machine state stored in columns.
+COIN_INVENTORY = "coin_inventory"
+INSERTED_COINS = "inserted_coins"
+PRODUCT_INVENTORY = "product_inventory"
+CURRENT_AMOUNT = "current_amount"
+
+HEADER = struct.Struct("=4sBcxxQQQQ")
+MARKER = b"VMFS"
+VERSION = 1
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+def _names_block(coins, products):
+    """Return the encoded coin and product names padded to 8 bytes."""
+    names = "\n".join(list(coins) + list(products)).encode("utf-8")
+    return names + b"\0" * (-len(names) % 8)
+
+class FleetStateStore():
+    """
+    Fleet state kept in a memory-mapped file.
+
+    Use FleetStateStore.create() for a new file, or FleetStateStore(path) to
+    open an existing one. Machines changed after they are accessed are
+    written back to the file by save() or flush().
+    """
+
+    def __init__(self, path, machine_class=VendingMachine):
+        self.path = path
+        self.machine_class = machine_class
+
+        # Machines built so far.
+        # Key = machine index. Value = vending machine.
+        self.machines = {}
+
+        self.file = open(path, "r+b")
+        self.mmap = None
+        try:
+            if os.fstat(self.file.fileno()).st_size < HEADER.size:
+                raise ValueError("%s is too short to be a fleet state file" % path)
+            self.mmap = mmap.mmap(self.file.fileno(), 0)
+            size, names_size = self._read_header()
+
+            # Number of machines in the fleet.
+            self.size = size
+
+            # Position of the first column and the position of each column in
+            # column order.
+            # Key = (field, coin or product name). Value = column number.
+            self.start = HEADER.size + names_size
+            self.column_index = {}
+            for field, keys in ((COIN_INVENTORY, self.coins),
+                                (INSERTED_COINS, self.coins),
+                                (PRODUCT_INVENTORY, self.products),
+                                (CURRENT_AMOUNT, [None])):
+                for key in keys:
+                    self.column_index[(field, key)] = len(self.column_index)
+
+            expected = self.start + 8 * size * len(self.column_index)
+            if len(self.mmap) != expected:
+                raise ValueError("%s is %d bytes but %d machines need %d bytes"
+                                 % (path, len(self.mmap), size, expected))
+
+            # All columns as one flat view of integers.
+            self.values = self._view()
+        except Exception:
+            if self.mmap is not None:
+                self.mmap.close()
+            self.file.close()
+            raise
+
+    def _view(self):
+        """Return all columns as one flat view of integers."""
+        return memoryview(self.mmap)[self.start:].cast("q")
+
+    def _read_header(self):
+        """
+        Check the header and names against the machine class.
+
+        Returns:
+            Number of machines and the size of the names.
+        """
+        path = self.path
+        machine_class = self.machine_class
+        marker, version, byte_order, size, coin_count, product_count, names_size = \
+            HEADER.unpack_from(self.mmap)
+        if marker != MARKER or version != VERSION:
+            raise ValueError("%s is not a fleet state file" % path)
+        if byte_order != BYTE_ORDER:
+            raise ValueError("%s was written with a different byte order" % path)
+        if len(self.mmap) < HEADER.size + names_size:
+            raise ValueError("%s is too short to hold its names" % path)
+
+        names = bytes(self.mmap[HEADER.size:HEADER.size + names_size]).rstrip(b"\0")
+        names = names.decode("utf-8").split("\n")
+        self.coins = names[:coin_count]
+        self.products = names[coin_count:coin_count + product_count]
+        if (self.coins != list(machine_class.VALID_COINS)
+                or self.products != list(machine_class.PRODUCTS)):
+            raise ValueError("%s does not match the coins and products of %s"
+                             % (path, machine_class.__name__))
+
+        return size, names_size
+
+    @classmethod
+    def create(cls, path, size, machine_class=VendingMachine):
+        """Create a store of empty machines and open it."""
+        coins = list(machine_class.VALID_COINS)
+        products = list(machine_class.PRODUCTS)
+        names = _names_block(coins, products)
+        columns = 2 * len(coins) + len(products) + 1
+
+        with open(path, "wb") as state_file:
+            state_file.write(HEADER.pack(MARKER, VERSION, BYTE_ORDER, size,
+                                         len(coins), len(products), len(names)))
+            state_file.write(names)
+            state_file.truncate(HEADER.size + len(names) + 8 * size * columns)
+
+        return cls(path, machine_class)
+
+    def __len__(self):
+        return self.size
+
+    def column(self, field, name=None):
+        """
+        Return a column of the fleet state without copying it. Writes to the
+        column change the file.
+
+        Args:
+            field (str): COIN_INVENTORY, INSERTED_COINS, PRODUCT_INVENTORY or CURRENT_AMOUNT.
+            name (str): Coin or product name. None for CURRENT_AMOUNT.
+
+        Returns:
+            memoryview of one integer per machine.
+        """
+        start = self.column_index[(field, name)] * self.size
+        return self.values[start:start + self.size]
+
+    def total(self, field, name=None):
+        """Return the total of a column over the fleet."""
+        return sum(self.column(field, name))
+
+    def _value(self, field, name, index):
+        """Return a machine's value of a field."""
+        return self.values[self.column_index[(field, name)] * self.size + index]
+
+    def __getitem__(self, index):
+        """Return the vending machine at the index, building it on first access."""
+        machine = self.machines.get(index)
+        if machine is None:
+            if not 0 <= index < self.size:
+                raise IndexError(index)
+
+            machine = self.machine_class()
+            for coin in self.coins:
+                machine.coin_inventory[coin] = self._value(COIN_INVENTORY, coin, index)
+                machine.inserted_coins[coin] = self._value(INSERTED_COINS, coin, index)
+            for product in self.products:
+                machine.product_inventory[product] = self._value(PRODUCT_INVENTORY, product, index)
+            machine.current_amount = self._value(CURRENT_AMOUNT, None, index)
+            self.machines[index] = machine
+
+        return machine
+
+    def save(self, index, machine=None):
+        """Write a machine's state to its row. The accessed machine if none is given."""
+        if machine is None:
+            machine = self.machines[index]
+
+        values = self.values
+        size = self.size
+        for (field, name), column in self.column_index.items():
+            if field == CURRENT_AMOUNT:
+                value = machine.current_amount
+            else:
+                value = getattr(machine, field)[name]
+            values[column * size + index] = value
+
+    def flush(self):
+        """Write every accessed machine to the file and flush it to disk."""
+        for index, machine in self.machines.items():
+            self.save(index, machine)
+        self.mmap.flush()
+
+    def close(self):
+        """
+        Flush and close the store.
+
+        Raises:
+            BufferError if a column returned by column() has not been
+            released. The store stays open and usable.
+        """
+        self.flush()
+        self.values.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            self.values = self._view()
+            raise BufferError("%s has columns in use; release them before closing" % self.path)
+
+        self.file.close()
@@ -0,0 +1,106 @@
+"""
+    Vending machine that can be driven from many threads.
+"""
+
+import threading
+
+from vending_machine import VendingMachine
+
+class ThreadSafeVendingMachine(VendingMachine):
+    """
+    Vending machine whose operations are atomic with respect to other threads.
+
+    Each machine has its own lock, so threads driving different machines
+    never wait on each other. Operations that change state hold the lock for
+    their whole duration, so a purchase or a batch of change is never seen
+    half done. Reading the display takes the lock only when a custom message
+    has to be cleared or the standard message worked out again; otherwise
+    the cached standard message is returned without locking.
+
+    Inventories changed directly through the dictionary views, instead of
+    through restock() or refill_coins(), are not locked and should not be
+    changed while other threads are using the machine.
+    """
+
+    __slots__ = ("lock",)
+
+    def __init__(self, change_strategy=None, catalog=None):
+        # Re-entrant so that operations can call each other.
+        self.lock = threading.RLock()
+        super().__init__(change_strategy, catalog)
+
+    @property
+    def display(self):
+        """Vending machine display."""
+        display_unit = self.display_unit
+        if not display_unit.message:
+            standard = display_unit.standard
+            if standard is not None:
+                return standard
+
+        with self.lock:
+            return VendingMachine.display.fget(self)
+
+    @display.setter
+    def display(self, value):
+        self.display_unit.message = value
+
+    def dispense_product(self, product):
+        """See VendingMachine.dispense_product()."""
+        with self.lock:
+            return super().dispense_product(product)
+
+    def exact_change_only(self):
+        """See VendingMachine.exact_change_only()."""
+        with self.lock:
+            return super().exact_change_only()
+
+    def insert_coin(self, coin):
+        """See VendingMachine.insert_coin()."""
+        with self.lock:
+            super().insert_coin(coin)
+
+    def insert_coins(self, codes):
+        """See VendingMachine.insert_coins()."""
+        with self.lock:
+            return super().insert_coins(codes)
+
+    def make_change(self, amount, return_coin=True):
+        """See VendingMachine.make_change()."""
+        with self.lock:
+            return super().make_change(amount, return_coin)
+
+    def purchase(self, product):
+        """
+        Dispense the product and return change for the rest of the current
+        amount as a single atomic operation.
+
+        Returns:
+            Tuple of whether the product was dispensed and the amount of
+            change returned in cents.
+        """
+        with self.lock:
+            if not super().dispense_product(product):
+                return False, 0
+
+            return True, super().return_change()
+
+    def refill_coins(self, quantities):
+        """See VendingMachine.refill_coins()."""
+        with self.lock:
+            super().refill_coins(quantities)
+
+    def restock(self, quantities):
+        """See VendingMachine.restock()."""
+        with self.lock:
+            super().restock(quantities)
+
+    def return_change(self):
+        """See VendingMachine.return_change()."""
+        with self.lock:
+            return super().return_change()
+
+    def return_inserted_coins(self):
+        """See VendingMachine.return_inserted_coins()."""
+        with self.lock:
+            super().return_inserted_coins()
@@ -0,0 +1,240 @@
+"""
+    Benchmarks for the vending machine hot paths.
+
+    Usage:
+        python3 vending_machine_benchmarks.py [--output results.json]
+                                              [--baseline baseline.json]
+                                              [--save-baseline baseline.json]
+                                              [--tolerance 0.25]
+
+    Each benchmark reports the best time per operation in nanoseconds over
+    several repeats. Results are written as JSON. When a baseline is given
+    the results are compared against it and the exit status is 1 if any
+    benchmark is slower than the baseline by more than the tolerance.
+
+    The cold_import benchmark times importing vending_machine in a new
+    interpreter. The exit status is also 1 if it takes longer than the
+    import budget.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+
+import vending_machine as vm
+from vending_machine import VendingMachine
+
+# Number of timing repeats. The best repeat is reported.
+REPEATS = 5
+
+# Longest time in milliseconds that importing vending_machine may take in
+# a new interpreter.
+IMPORT_BUDGET_MS = 25
+
+# Script run in a new interpreter to time an import. Prints the nanoseconds
+# taken and the modules the import loaded.
+IMPORT_SCRIPT = """
+import sys, time
+before = set(sys.modules)
+start = time.perf_counter_ns()
+import %s
+print(time.perf_counter_ns() - start)
+print(" ".join(sorted(set(sys.modules) - before)))
+"""
+
+class ManyCoinVendingMachine(VendingMachine):
+    """Vending machine with a large, non-canonical coin set."""
+    VALID_COINS = {"COIN_%d" % value : value for value in (1, 2, 3, 5, 7, 10, 12, 20, 25, 50, 100)}
+    PRODUCTS = {"PRODUCT_%d" % index : 35 + 15 * index for index in range(40)}
+
+def stocked(machine_class=VendingMachine, coins=50, products=50):
+    """Return a machine with deep coin and product inventories."""
+    machine = machine_class()
+    for coin in machine.coin_inventory:
+        machine.coin_inventory[coin] = coins
+    for product in machine.product_inventory:
+        machine.product_inventory[product] = products
+
+    return machine
+
+def bench_display():
+    machine = stocked()
+    return lambda: machine.display
+
+def bench_display_after_insert():
+    machine = stocked()
+
+    def run():
+        machine.insert_coin(vm.NICKEL)
+        return machine.display
+    return run
+
+def bench_exact_change_only():
+    machine = stocked()
+    return machine.exact_change_only
+
+def bench_exact_change_only_many_coins():
+    machine = stocked(ManyCoinVendingMachine)
+    return machine.exact_change_only
+
+def bench_make_change():
+    machine = stocked(coins=10 ** 9)
+    return lambda: machine.make_change(90)
+
+def bench_make_change_feasibility():
+    machine = stocked()
+    return lambda: machine.make_change(90, return_coin=False)
+
+def bench_make_change_many_coins():
+    machine = stocked(ManyCoinVendingMachine, coins=10 ** 9)
+    return lambda: machine.make_change(187)
+
+def bench_insert_coin():
+    machine = stocked()
+    return lambda: machine.insert_coin(vm.QUARTER)
+
+def bench_insert_rejected_coin():
+    machine = stocked()
+    return lambda: machine.insert_coin(vm.PENNY)
+
+def bench_insert_coins():
+    machine = stocked()
+    codes = bytes(range(4)) * 256
+    return lambda: machine.insert_coins(codes)
+
+def bench_dispense_product():
+    machine = stocked(products=10 ** 9)
+
+    def run():
+        machine.current_amount = 100
+        machine.dispense_product(vm.COLA)
+    return run
+
+def bench_process_transactions():
+    machine = stocked(coins=10 ** 6, products=10 ** 9)
+    sessions = [vm.Session([vm.QUARTER, vm.QUARTER, vm.QUARTER], vm.CANDY),
+                vm.Session([vm.QUARTER] * 4, vm.COLA),
+                vm.Session([vm.DIME, vm.PENNY], None, True),
+                vm.Session([vm.QUARTER, vm.QUARTER], vm.CHIPS)] * 250
+
+    def run():
+        for _ in machine.process_transactions(sessions):
+            pass
+    return run
+
+# Benchmarks and the number of operations in one call of the benchmark.
+BENCHMARKS = {"display" : (bench_display, 1),
+              "display_after_insert" : (bench_display_after_insert, 1),
+              "exact_change_only" : (bench_exact_change_only, 1),
+              "exact_change_only_many_coins" : (bench_exact_change_only_many_coins, 1),
+              "make_change" : (bench_make_change, 1),
+              "make_change_feasibility" : (bench_make_change_feasibility, 1),
+              "make_change_many_coins" : (bench_make_change_many_coins, 1),
+              "insert_coin" : (bench_insert_coin, 1),
+              "insert_rejected_coin" : (bench_insert_rejected_coin, 1),
+              "insert_coins" : (bench_insert_coins, 1024),
+              "dispense_product" : (bench_dispense_product, 1),
+              "process_transactions" : (bench_process_transactions, 1000)}
+
+def measure(setup, operations):
+    """Return the best time per operation in nanoseconds."""
+    timer = timeit.Timer(setup())
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=REPEATS, number=number))
+    return best / number / operations * 1e9
+
+def cold_import(module="vending_machine"):
+    """
+    Import a module in a new interpreter.
+
+    Returns:
+        Tuple of the nanoseconds the import took and the set of modules it loaded.
+    """
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT % module],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    nanoseconds, modules = output.split("\n")[:2]
+    return int(nanoseconds), set(modules.split())
+
+def measure_import(module="vending_machine"):
+    """Return the best time in nanoseconds to import a module in a new interpreter."""
+    return min(cold_import(module)[0] for _ in range(REPEATS))
+
+def run(names=None):
+    """Run the benchmarks and return the results keyed by benchmark name."""
+    results = {}
+    for name, (setup, operations) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results[name] = round(measure(setup, operations), 1)
+
+    if not names or "cold_import" in names:
+        results["cold_import"] = round(measure_import(), 1)
+
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a baseline.
+
+    Returns:
+        List of (name, baseline ns, result ns) for benchmarks slower than
+        the baseline by more than the tolerance.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is not None and result > expected * (1 + tolerance):
+            regressions.append((name, expected, result))
+
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1].strip())
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare results against this JSON file")
+    parser.add_argument("--save-baseline", help="write results as a baseline to this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (default: 0.25)")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_MS,
+                        help="longest allowed cold import in ms (default: %d)" % IMPORT_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    results = run(args.names)
+    for name, result in results.items():
+        print("%-32s %12.1f ns" % (name, result))
+
+    document = {"python" : platform.python_version(),
+                "machine" : platform.machine(),
+                "unit" : "ns",
+                "results" : results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as output_file:
+                json.dump(document, output_file, indent=2, sort_keys=True)
+
+    status = 0
+    if results.get("cold_import", 0) > args.import_budget * 1e6:
+        print("OVER BUDGET cold_import: %.1f ms > %.1f ms"
+              % (results["cold_import"] / 1e6, args.import_budget))
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+        regressions = compare(results, baseline, args.tolerance)
+        for name, expected, result in regressions:
+            print("REGRESSION %s: %.1f ns -> %.1f ns" % (name, expected, result))
+        if regressions:
+            status = 1
+
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+    Fakes and helpers shared by the vending machine tests.
+"""
+
+import vending_machine as vm
+from vending_machine import VendingMachine
+
+class FakeClock():
+    """Clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def stocked_machine(nickels, stock):
+    """
+    Return a machine with nickels for change and products in stock.
+
+    Args:
+        nickels (int): Quantity of nickels in the coin inventory.
+        stock (dict): Key = product name. Value = quantity.
+    """
+    machine = VendingMachine()
+    machine.coin_inventory[vm.NICKEL] = nickels
+    for product, quantity in stock.items():
+        machine.product_inventory[product] = quantity
+    return machine
+
+def buy(machine, product, coins):
+    """Buy the product with the coins and take the change."""
+    for coin in coins:
+        machine.insert_coin(coin)
+    machine.dispense_product(product)
+    machine.return_change()
+
+def buy_candy(machine):
+    """Buy candy with three quarters and take the change."""
+    buy(machine, vm.CANDY, [vm.QUARTER, vm.QUARTER, vm.QUARTER])
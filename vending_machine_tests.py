@@ -4,8 +4,12 @@
     Date: 08/29/2017
 """
 
+import itertools
+import random
 import unittest
+from array import array
 import vending_machine as vm
+import vending_machine_benchmarks
 from vending_machine import VendingMachine
 
 class VendingMachineTest(unittest.TestCase):
@@ -25,13 +29,13 @@ class VendingMachineTest(unittest.TestCase):
         self.assertFalse(self.machine.is_valid_coin(vm.PENNY))
 
     def test_coin_values(self):
-        self.assertEqual(0.05, self.machine.VALID_COINS[vm.NICKEL])
-        self.assertEqual(0.10, self.machine.VALID_COINS[vm.DIME])
-        self.assertEqual(0.25, self.machine.VALID_COINS[vm.QUARTER])
+        self.assertEqual(5, self.machine.VALID_COINS[vm.NICKEL])
+        self.assertEqual(10, self.machine.VALID_COINS[vm.DIME])
+        self.assertEqual(25, self.machine.VALID_COINS[vm.QUARTER])
 
     def test_insert_coin_with_nickel_and_check_inserted_amount_and_inserted_coins(self):
         self.machine.insert_coin(vm.NICKEL)
-        self.assertEqual(0.05, self.machine.current_amount)
+        self.assertEqual(5, self.machine.current_amount)
         self.assertEqual(1, self.machine.inserted_coins[vm.NICKEL])
 
     def test_insert_coin_with_different_coins_and_check_inserted_amount_and_inserted_coins(self):
@@ -44,7 +48,7 @@ class VendingMachineTest(unittest.TestCase):
         self.machine.insert_coin(vm.QUARTER)
         self.machine.insert_coin(vm.QUARTER)
 
-        self.assertEqual(0.80, self.machine.current_amount)
+        self.assertEqual(80, self.machine.current_amount)
 
         self.assertEqual(2, self.machine.inserted_coins[vm.NICKEL])
         self.assertEqual(2, self.machine.inserted_coins[vm.DIME])
@@ -72,21 +76,33 @@ class VendingMachineTest(unittest.TestCase):
         self.assertEqual(0, self.machine.inserted_coins[vm.DIME])
         self.assertEqual(0, self.machine.inserted_coins[vm.QUARTER])
 
+    def test_insert_coin_with_many_dimes_should_not_drift(self):
+        self.machine.product_inventory[vm.COLA] = 1
+        for _ in range(1000):
+            self.machine.insert_coin(vm.DIME)
+        self.assertEqual(10000, self.machine.current_amount)
+        self.assertEqual("$100.00", self.machine.display)
+
+    def test_format_amount(self):
+        self.assertEqual("$0.00", vm.format_amount(0))
+        self.assertEqual("$0.65", vm.format_amount(65))
+        self.assertEqual("$12.05", vm.format_amount(1205))
+
     def test_return_coin_with_nickel_and_check_current_amount(self):
         self.machine.insert_coin(vm.NICKEL)
-        self.assertEqual(0.05, self.machine.current_amount)
+        self.assertEqual(5, self.machine.current_amount)
 
         self.machine.return_inserted_coins()
-        self.assertEqual(0.0, self.machine.current_amount)
+        self.assertEqual(0, self.machine.current_amount)
 
     def test_check_cola_price(self):
-        self.assertEqual(1.0, self.machine.PRODUCTS[vm.COLA])
+        self.assertEqual(100, self.machine.PRODUCTS[vm.COLA])
 
     def test_check_chip_price(self):
-        self.assertEqual(0.50, self.machine.PRODUCTS[vm.CHIPS])
+        self.assertEqual(50, self.machine.PRODUCTS[vm.CHIPS])
 
     def test_check_candy_price(self):
-        self.assertEqual(0.65, self.machine.PRODUCTS[vm.CANDY])
+        self.assertEqual(65, self.machine.PRODUCTS[vm.CANDY])
 
     def test_select_cola_without_enough_money(self):
         self.machine.select_cola()
@@ -109,7 +125,7 @@ class VendingMachineTest(unittest.TestCase):
 
         self.machine.select_cola()
 
-        self.assertEqual(0.0, self.machine.current_amount)
+        self.assertEqual(0, self.machine.current_amount)
         self.assertEqual(4, self.machine.coin_inventory[vm.QUARTER])
         self.assertEqual(vm.COLA, self.machine.product_dispense_bin)
 
@@ -123,7 +139,7 @@ class VendingMachineTest(unittest.TestCase):
 
         self.machine.select_cola()
 
-        self.assertEqual(0.05, round(self.machine.current_amount, 2))
+        self.assertEqual(5, self.machine.current_amount)
         self.assertEqual(3, self.machine.coin_inventory[vm.QUARTER])
         self.assertEqual(3, self.machine.coin_inventory[vm.DIME])
         self.assertEqual(vm.COLA, self.machine.product_dispense_bin)
@@ -138,7 +154,7 @@ class VendingMachineTest(unittest.TestCase):
 
         self.machine.select_chips()
 
-        self.assertEqual(0.0, self.machine.current_amount)
+        self.assertEqual(0, self.machine.current_amount)
         self.assertEqual(2, self.machine.coin_inventory[vm.QUARTER])
         self.assertEqual(vm.CHIPS, self.machine.product_dispense_bin)
 
@@ -150,7 +166,7 @@ class VendingMachineTest(unittest.TestCase):
 
         self.machine.select_chips()
 
-        self.assertEqual(0.05, round(self.machine.current_amount, 2))
+        self.assertEqual(5, self.machine.current_amount)
         self.assertEqual(1, self.machine.coin_inventory[vm.QUARTER])
         self.assertEqual(3, self.machine.coin_inventory[vm.DIME])
         self.assertEqual(vm.CHIPS, self.machine.product_dispense_bin)
@@ -167,7 +183,7 @@ class VendingMachineTest(unittest.TestCase):
 
         self.machine.select_candy()
 
-        self.assertEqual(0.0, self.machine.current_amount)
+        self.assertEqual(0, self.machine.current_amount)
         self.assertEqual(2, self.machine.coin_inventory[vm.QUARTER])
         self.assertEqual(1, self.machine.coin_inventory[vm.DIME])
         self.assertEqual(1, self.machine.coin_inventory[vm.NICKEL])
@@ -181,38 +197,38 @@ class VendingMachineTest(unittest.TestCase):
 
         self.machine.select_candy()
 
-        self.assertEqual(0.05, round(self.machine.current_amount, 2))
+        self.assertEqual(5, self.machine.current_amount)
         self.assertEqual(2, self.machine.coin_inventory[vm.QUARTER])
         self.assertEqual(2, self.machine.coin_inventory[vm.DIME])
         self.assertEqual(vm.CANDY, self.machine.product_dispense_bin)
 
     def test_make_change_for_five_cents_with_one_nickel_in_coin_inventory(self):
         self.machine.coin_inventory[vm.NICKEL] += 1
-        self.machine.make_change(0.05)
+        self.machine.make_change(5)
         self.assertEqual(1, self.machine.coin_return[vm.NICKEL])
 
     def test_make_change_for_ten_cents_with_two_nickels(self):
         self.machine.coin_inventory[vm.NICKEL] += 2
-        self.machine.make_change(0.10)
+        self.machine.make_change(10)
         self.assertEqual(2, self.machine.coin_return[vm.NICKEL])
         self.assertEqual(0, self.machine.coin_inventory[vm.NICKEL])
 
     def test_make_change_for_ten_cents_with_one_dime(self):
         self.machine.coin_inventory[vm.DIME] += 1
-        self.machine.make_change(0.10)
+        self.machine.make_change(10)
         self.assertEqual(1, self.machine.coin_return[vm.DIME])
         self.assertEqual(0, self.machine.coin_inventory[vm.DIME])
 
     def test_make_change_for_fifteen_cents_with_three_nickels(self):
         self.machine.coin_inventory[vm.NICKEL] = 3
-        self.machine.make_change(0.15)
+        self.machine.make_change(15)
         self.assertEqual(3, self.machine.coin_return[vm.NICKEL])
         self.assertEqual(0, self.machine.coin_inventory[vm.NICKEL])
 
     def test_make_change_for_fifteen_cents_with_one_nickel_and_one_dime(self):
         self.machine.coin_inventory[vm.NICKEL] = 1
         self.machine.coin_inventory[vm.DIME] = 1
-        self.machine.make_change(0.15)
+        self.machine.make_change(15)
         self.assertEqual(1, self.machine.coin_return[vm.NICKEL])
         self.assertEqual(1, self.machine.coin_return[vm.DIME])
         self.assertEqual(0, self.machine.coin_inventory[vm.NICKEL])
@@ -220,14 +236,14 @@ class VendingMachineTest(unittest.TestCase):
 
     def test_make_change_for_twenty_cents_with_four_nickels(self):
         self.machine.coin_inventory[vm.NICKEL] = 4
-        self.machine.make_change(0.20)
+        self.machine.make_change(20)
         self.assertEqual(4, self.machine.coin_return[vm.NICKEL])
         self.assertEqual(0, self.machine.coin_inventory[vm.NICKEL])
 
     def test_make_change_for_twenty_cents_with_two_nickels_and_one_dimes(self):
         self.machine.coin_inventory[vm.NICKEL] = 2
         self.machine.coin_inventory[vm.DIME] = 1
-        self.machine.make_change(0.20)
+        self.machine.make_change(20)
         self.assertEqual(2, self.machine.coin_return[vm.NICKEL])
         self.assertEqual(1, self.machine.coin_return[vm.DIME])
         self.assertEqual(0, self.machine.coin_inventory[vm.NICKEL])
@@ -235,10 +251,69 @@ class VendingMachineTest(unittest.TestCase):
 
     def test_make_change_for_twenty_cents_with_two_dimes(self):
         self.machine.coin_inventory[vm.DIME] = 2
-        self.machine.make_change(0.20)
+        self.machine.make_change(20)
         self.assertEqual(2, self.machine.coin_return[vm.DIME])
         self.assertEqual(0, self.machine.coin_inventory[vm.DIME])
 
+    def test_make_change_for_thirty_cents_with_one_quarter_and_three_dimes(self):
+        self.machine.coin_inventory[vm.QUARTER] = 1
+        self.machine.coin_inventory[vm.DIME] = 3
+        self.assertTrue(self.machine.make_change(30))
+        self.assertEqual(3, self.machine.coin_return[vm.DIME])
+        self.assertEqual(1, self.machine.coin_inventory[vm.QUARTER])
+        self.assertEqual(0, self.machine.coin_inventory[vm.DIME])
+
+    def test_make_change_with_greedy_strategy_without_fallback(self):
+        coins_desc = sorted(VendingMachine.VALID_COINS.items(), key=lambda x: x[1], reverse=True)
+        machine = VendingMachine(vm.GreedyStrategy(coins_desc))
+        machine.coin_inventory[vm.QUARTER] = 1
+        machine.coin_inventory[vm.DIME] = 3
+        self.assertTrue(machine.make_change(30))
+        self.assertEqual(3, machine.coin_return[vm.DIME])
+        self.assertEqual(1, machine.coin_inventory[vm.QUARTER])
+
+    def test_make_change_without_enough_coins_should_not_modify_coin_inventory(self):
+        self.machine.coin_inventory[vm.QUARTER] = 1
+        self.assertFalse(self.machine.make_change(30))
+        self.assertEqual(1, self.machine.coin_inventory[vm.QUARTER])
+        self.assertEqual({}, self.machine.coin_return)
+
+    def test_make_change_for_amount_larger_than_change_table(self):
+        self.machine.coin_inventory[vm.QUARTER] = 8
+        self.assertTrue(self.machine.make_change(200, return_coin=False))
+        self.assertFalse(self.machine.make_change(205, return_coin=False))
+
+    def test_make_change_for_large_amount_does_not_grow_change_table(self):
+        self.machine.coin_inventory[vm.NICKEL] = 4
+        limit = self.machine.change_table.limit
+
+        self.assertFalse(self.machine.make_change(10000, return_coin=False))
+        self.assertEqual(limit, self.machine.change_table.limit)
+        self.assertEqual(limit + 1, len(self.machine.change_table.ways))
+
+    def test_change_beyond_table_limit_matches_brute_force(self):
+        rng = random.Random(3)
+        values = [5, 10, 25]
+        for _ in range(50):
+            counts = [rng.randint(0, 4) for _ in values]
+            table = vm.ChangeTable(values, 20)
+            for index, count in enumerate(counts):
+                table.set_count(index, count)
+
+            makeable = {sum(value * used for value, used in zip(values, combination))
+                        for combination in itertools.product(*(range(count + 1) for count in counts))}
+            for amount in range(21, 160):
+                self.assertEqual(amount in makeable, table.can_make(amount))
+
+    def test_select_chips_adds_inserted_coins_to_coin_inventory(self):
+        self.machine.coin_inventory[vm.QUARTER] = 3
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.insert_coin(vm.QUARTER)
+
+        self.machine.select_chips()
+
+        self.assertEqual(5, self.machine.coin_inventory[vm.QUARTER])
+
     def test_is_machine_sold_out_should_return_true(self):
         self.assertTrue(self.machine.is_machine_sold_out())
 
@@ -297,22 +372,35 @@ class VendingMachineTest(unittest.TestCase):
     def test_exact_change_only_should_return_true_with_coins(self):
         self.machine.coin_inventory[vm.NICKEL] = 2
 
+        self.assertTrue(self.machine.exact_change_only())
+
+    def test_exact_change_only_should_return_false_after_adding_coins(self):
+        self.machine.coin_inventory[vm.NICKEL] = 2
+        self.machine.coin_inventory[vm.DIME] = 1
+
         self.assertFalse(self.machine.exact_change_only())
 
+    def test_exact_change_only_should_return_true_after_removing_coins(self):
+        self.machine.coin_inventory[vm.NICKEL] = 3
+        self.machine.coin_inventory[vm.DIME] = 3
+        self.machine.coin_inventory[vm.NICKEL] = 0
+
+        self.assertTrue(self.machine.exact_change_only())
+
     def test_display_should_show_insert_coin_with_coins_in_inventory(self):
         self.machine.product_inventory[vm.COLA] = 5
-        self.machine.coin_inventory[vm.NICKEL] = 3
+        self.machine.coin_inventory[vm.NICKEL] = 4
         self.assertEqual("INSERT COIN", self.machine.display)
 
     def test_display_should_show_amount_inserted(self):
         self.machine.product_inventory[vm.COLA] = 5
-        self.machine.coin_inventory[vm.NICKEL] = 3
+        self.machine.coin_inventory[vm.NICKEL] = 4
         self.machine.insert_coin(vm.NICKEL)
         self.assertEqual("$0.05", self.machine.display)
 
     def test_display_should_say_thank_you_after_dispensing_item(self):
         self.machine.product_inventory[vm.COLA] = 5
-        self.machine.coin_inventory[vm.NICKEL] = 3
+        self.machine.coin_inventory[vm.NICKEL] = 4
         self.machine.insert_coin(vm.QUARTER)
         self.machine.insert_coin(vm.QUARTER)
         self.machine.insert_coin(vm.QUARTER)
@@ -336,7 +424,7 @@ class VendingMachineTest(unittest.TestCase):
 
     def test_display_should_show_price_then_insert_coin_after_selecting_item_with_no_money(self):
         self.machine.product_inventory[vm.COLA] = 5
-        self.machine.coin_inventory[vm.NICKEL] = 3
+        self.machine.coin_inventory[vm.NICKEL] = 4
         self.machine.select_cola()
 
         self.assertEqual("PRICE $1.00", self.machine.display)
@@ -344,7 +432,7 @@ class VendingMachineTest(unittest.TestCase):
 
     def test_display_should_show_insert_coin_after_returning_coins(self):
         self.machine.product_inventory[vm.COLA] = 5
-        self.machine.coin_inventory[vm.NICKEL] = 3
+        self.machine.coin_inventory[vm.NICKEL] = 4
         self.machine.insert_coin(vm.QUARTER)
         self.machine.return_inserted_coins()
 
@@ -357,5 +445,336 @@ class VendingMachineTest(unittest.TestCase):
         self.machine.product_inventory[vm.COLA] = 5
         self.assertEqual("EXACT CHANGE ONLY", self.machine.display)
 
+class DisplayCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.machine.product_inventory[vm.COLA] = 1
+        self.machine.coin_inventory[vm.NICKEL] = 4
+
+    def test_standard_message_is_cached(self):
+        self.assertEqual("INSERT COIN", self.machine.display)
+        self.assertEqual("INSERT COIN", self.machine.display_unit.standard)
+
+    def test_cached_message_is_invalidated_by_product_inventory(self):
+        self.assertEqual("INSERT COIN", self.machine.display)
+        self.machine.product_inventory[vm.COLA] = 0
+        self.assertEqual("SOLD OUT", self.machine.display)
+
+    def test_cached_message_is_invalidated_by_coin_inventory(self):
+        self.assertEqual("INSERT COIN", self.machine.display)
+        self.machine.make_change(20)
+        self.assertEqual("EXACT CHANGE ONLY", self.machine.display)
+
+    def test_cached_message_is_invalidated_by_current_amount(self):
+        self.assertEqual("INSERT COIN", self.machine.display)
+        self.machine.insert_coin(vm.DIME)
+        self.assertEqual("$0.10", self.machine.display)
+        self.machine.return_inserted_coins()
+        self.assertEqual("INSERT COIN", self.machine.display)
+
+    def test_cached_message_is_not_invalidated_by_rejected_coin(self):
+        self.assertEqual("INSERT COIN", self.machine.display)
+        self.machine.insert_coin(vm.PENNY)
+        self.assertEqual("INSERT COIN", self.machine.display_unit.standard)
+
+class ProcessTransactionsTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.machine.product_inventory[vm.COLA] = 5
+        self.machine.product_inventory[vm.CANDY] = 5
+        self.machine.coin_inventory[vm.NICKEL] = 4
+
+    def test_session_with_exact_money(self):
+        results = list(self.machine.process_transactions(
+            [vm.Session([vm.QUARTER] * 4, vm.COLA)]))
+
+        self.assertEqual([vm.SessionResult(vm.COLA, 0, 0, "THANK YOU")], results)
+        self.assertEqual(4, self.machine.product_inventory[vm.COLA])
+
+    def test_session_with_extra_money_makes_change(self):
+        results = list(self.machine.process_transactions(
+            [vm.Session([vm.QUARTER, vm.QUARTER, vm.QUARTER], vm.CANDY)]))
+
+        self.assertEqual([vm.SessionResult(vm.CANDY, 10, 0, "THANK YOU")], results)
+        self.assertEqual(0, self.machine.current_amount)
+        self.assertEqual(2, self.machine.coin_return[vm.NICKEL])
+
+    def test_session_without_enough_money_and_coin_return(self):
+        results = list(self.machine.process_transactions(
+            [vm.Session([vm.QUARTER, vm.PENNY], vm.COLA, True)]))
+
+        self.assertEqual([vm.SessionResult("", 0, 25, "PRICE $1.00")], results)
+        self.assertEqual({vm.QUARTER : 1, vm.PENNY : 1}, self.machine.coin_return)
+
+    def test_sessions_accept_plain_tuples(self):
+        results = list(self.machine.process_transactions(
+            [([vm.DIME], None, False), ([vm.QUARTER] * 4, vm.COLA, False)]))
+
+        self.assertEqual("$0.10", results[0].display)
+        self.assertEqual(vm.COLA, results[1].dispensed)
+        self.assertEqual(10, results[1].change)
+
+    def test_sessions_are_applied_lazily(self):
+        results = self.machine.process_transactions([vm.Session([vm.QUARTER])] * 3)
+
+        self.assertEqual(0, self.machine.current_amount)
+        next(results)
+        self.assertEqual(25, self.machine.current_amount)
+
+class ObserverTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.machine.product_inventory[vm.CHIPS] = 1
+        self.machine.coin_inventory[vm.DIME] = 1
+        self.events = []
+        self.machine.add_observer(self.observe)
+
+    def observe(self, machine, event, name, quantity):
+        self.events.append((event, name, quantity))
+
+    def test_observer_is_notified_of_purchase(self):
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.insert_coin(vm.PENNY)
+        self.machine.insert_coin(vm.QUARTER)
+        self.machine.insert_coin(vm.DIME)
+        self.machine.select_chips()
+        self.machine.make_change(10)
+
+        self.assertEqual([(vm.COIN_ACCEPTED, vm.QUARTER, 1),
+                          (vm.COIN_REJECTED, vm.PENNY, 1),
+                          (vm.COIN_ACCEPTED, vm.QUARTER, 1),
+                          (vm.COIN_ACCEPTED, vm.DIME, 1),
+                          (vm.PRODUCT_DISPENSED, vm.CHIPS, 1),
+                          (vm.CHANGE_RETURNED, vm.DIME, 1)], self.events)
+
+    def test_observer_is_notified_of_returned_coins(self):
+        self.machine.insert_coin(vm.NICKEL)
+        self.machine.insert_coin(vm.NICKEL)
+        self.machine.return_inserted_coins()
+
+        self.assertEqual((vm.COINS_RETURNED, vm.NICKEL, 2), self.events[-1])
+
+    def test_observer_is_notified_of_restocking(self):
+        self.machine.restock({vm.COLA : 3})
+        self.machine.refill_coins({vm.QUARTER : 2})
+
+        self.assertEqual([(vm.PRODUCT_RESTOCKED, vm.COLA, 3),
+                          (vm.COINS_REFILLED, vm.QUARTER, 2)], self.events)
+        self.assertEqual(3, self.machine.product_inventory[vm.COLA])
+        self.assertEqual(2, self.machine.coin_inventory[vm.QUARTER])
+
+    def test_removed_observer_is_not_notified(self):
+        self.machine.remove_observer(self.observe)
+        self.machine.insert_coin(vm.NICKEL)
+
+        self.assertEqual([], self.events)
+
+class InsertCoinsTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+        self.events = []
+        self.machine.add_observer(
+            lambda machine, event, name, quantity: self.events.append((event, name, quantity)))
+
+    def test_batch_matches_inserting_each_coin(self):
+        rng = random.Random(7)
+        codes = bytes(rng.randrange(len(VendingMachine.COIN_CODES)) for _ in range(1000))
+        machine = VendingMachine()
+        for code in codes:
+            machine.insert_coin(VendingMachine.COIN_CODES[code])
+
+        accepted = self.machine.insert_coins(codes)
+
+        self.assertEqual(sum(machine.inserted_coins.values()), accepted)
+        self.assertEqual(machine.inserted_coins, self.machine.inserted_coins)
+        self.assertEqual(machine.coin_return, self.machine.coin_return)
+        self.assertEqual(machine.current_amount, self.machine.current_amount)
+        self.assertEqual(machine.display, self.machine.display)
+
+    def test_observers_get_one_event_for_each_kind_of_coin(self):
+        self.machine.insert_coins(array("B", [3, 0, 3, 2, 0]))
+
+        self.assertEqual([(vm.COIN_ACCEPTED, vm.QUARTER, 2),
+                          (vm.COIN_REJECTED, vm.PENNY, 2),
+                          (vm.COIN_ACCEPTED, vm.DIME, 1)], self.events)
+
+    def test_unknown_code_should_raise_value_error(self):
+        with self.assertRaises(ValueError):
+            self.machine.insert_coins(bytes([3, 4]))
+
+        self.assertEqual(0, self.machine.current_amount)
+        self.assertEqual([], self.events)
+
+class ImportTest(unittest.TestCase):
+    # Modules only the optional subsystems need.
+    OPTIONAL_MODULES = {"asyncio", "concurrent.futures", "csv", "json", "mmap", "random",
+                        "sqlite3", "struct", "threading"}
+
+    def test_import_loads_no_optional_modules(self):
+        _, modules = vending_machine_benchmarks.cold_import()
+
+        self.assertIn("vending_machine", modules)
+        subsystems = set("vending_machine." + name for name in vm.SUBSYSTEMS)
+        self.assertEqual(set(), modules & (self.OPTIONAL_MODULES | subsystems))
+
+    def test_subsystem_is_imported_on_first_use(self):
+        catalog = vm.catalog
+        self.assertIs(catalog, vm.catalog)
+        self.assertEqual(100, catalog.parse_price("1.00"))
+
+    def test_unknown_attribute_should_raise_attribute_error(self):
+        with self.assertRaises(AttributeError):
+            vm.warehouse
+
+class MachineStateTest(unittest.TestCase):
+    def setUp(self):
+        self.machine = VendingMachine()
+
+    def test_machine_has_no_instance_dictionary(self):
+        self.assertFalse(hasattr(self.machine, "__dict__"))
+
+    def test_machines_share_layout(self):
+        self.assertIs(self.machine.layout, VendingMachine().layout)
+
+    def test_coin_inventory_view(self):
+        self.machine.coin_inventory[vm.DIME] = 2
+        self.assertEqual({vm.NICKEL : 0, vm.DIME : 2, vm.QUARTER : 0}, self.machine.coin_inventory)
+        self.assertEqual([vm.NICKEL, vm.DIME, vm.QUARTER], list(self.machine.coin_inventory))
+
+    def test_product_inventory_view_with_unknown_product_should_raise_key_error(self):
+        with self.assertRaises(KeyError):
+            self.machine.product_inventory["GUM"] = 1
+
+    def test_coin_return_only_contains_returned_coins(self):
+        self.assertEqual({}, self.machine.coin_return)
+        self.assertNotIn(vm.NICKEL, self.machine.coin_return)
+
+        self.machine.insert_coin(vm.PENNY)
+        self.machine.insert_coin(vm.NICKEL)
+        self.machine.return_inserted_coins()
+
+        self.assertEqual({vm.NICKEL : 1, vm.PENNY : 1}, self.machine.coin_return)
+
+    def test_coin_return_can_be_emptied(self):
+        self.machine.insert_coin(vm.PENNY)
+        self.machine.insert_coin(vm.NICKEL)
+        self.machine.return_inserted_coins()
+
+        self.machine.coin_return.clear()
+
+        self.assertEqual({}, self.machine.coin_return)
+
+class ForeignCoinVendingMachine(VendingMachine):
+    VALID_COINS = {"FOUR" : 4, "THREE" : 3, "ONE" : 1}
+
+class ChangeStrategyTest(unittest.TestCase):
+    def setUp(self):
+        self.coins_desc = [("FOUR", 4), ("THREE", 3), ("ONE", 1)]
+
+    def test_is_canonical_with_us_coins_should_return_true(self):
+        self.assertTrue(vm.is_canonical(VendingMachine.VALID_COINS.values()))
+
+    def test_is_canonical_with_foreign_coins_should_return_false(self):
+        self.assertFalse(vm.is_canonical([4, 3, 1]))
+
+    def test_change_strategy_for_us_coins_is_greedy(self):
+        strategy = vm.change_strategy_for(VendingMachine.VALID_COINS)
+        self.assertIsInstance(strategy, vm.GreedyStrategy)
+        self.assertIs(strategy, vm.change_strategy_for(VendingMachine.VALID_COINS))
+
+    def test_change_strategy_for_foreign_coins_is_optimal(self):
+        strategy = vm.change_strategy_for(ForeignCoinVendingMachine.VALID_COINS)
+        self.assertIsInstance(strategy, vm.CachedStrategy)
+        self.assertIsInstance(strategy.strategy, vm.OptimalStrategy)
+
+    def test_greedy_strategy_without_fallback_is_not_optimal_for_non_canonical_coins(self):
+        strategy = vm.GreedyStrategy(self.coins_desc)
+        inventory = {"FOUR" : 5, "THREE" : 5, "ONE" : 5}
+        self.assertEqual({"FOUR" : 1, "ONE" : 2}, strategy.make_change(6, inventory))
+
+    def test_optimal_strategy_uses_fewest_coins(self):
+        strategy = vm.OptimalStrategy(self.coins_desc)
+        inventory = {"FOUR" : 5, "THREE" : 5, "ONE" : 5}
+        self.assertEqual({"THREE" : 2}, strategy.make_change(6, inventory))
+
+    def test_optimal_strategy_matches_brute_force(self):
+        rng = random.Random(5)
+        coins_desc = [("SEVEN", 7), ("FIVE", 5), ("THREE", 3), ("ONE", 1)]
+        strategy = vm.OptimalStrategy(coins_desc)
+        for _ in range(50):
+            inventory = {coin_name : rng.randint(0, 9) for coin_name, _ in coins_desc}
+            fewest = {}
+            for combination in itertools.product(*(range(inventory[coin_name] + 1)
+                                                   for coin_name, _ in coins_desc)):
+                total = sum(value * used for (_, value), used in zip(coins_desc, combination))
+                fewest[total] = min(fewest.get(total, total + 1), sum(combination))
+
+            for amount in range(1, 60):
+                change = strategy.make_change(amount, inventory)
+                if amount not in fewest:
+                    self.assertIsNone(change)
+                    continue
+
+                self.assertEqual(amount, sum(quantity * dict(coins_desc)[coin_name]
+                                             for coin_name, quantity in change.items()))
+                self.assertTrue(all(quantity <= inventory[coin_name]
+                                    for coin_name, quantity in change.items()))
+                self.assertEqual(fewest[amount], sum(change.values()))
+
+    def test_optimal_strategy_without_enough_coins_should_return_none(self):
+        strategy = vm.OptimalStrategy(self.coins_desc)
+        inventory = {"FOUR" : 1, "THREE" : 0, "ONE" : 1}
+        self.assertIsNone(strategy.make_change(6, inventory))
+
+    def test_greedy_strategy_falls_back_when_short_of_coins(self):
+        strategy = vm.GreedyStrategy([("QUARTER", 25), ("DIME", 10), ("NICKEL", 5)],
+                                     fallback=vm.OptimalStrategy([("QUARTER", 25), ("DIME", 10), ("NICKEL", 5)]))
+        inventory = {"QUARTER" : 1, "DIME" : 3, "NICKEL" : 0}
+        self.assertEqual({"DIME" : 3}, strategy.make_change(30, inventory))
+
+    def test_cached_strategy_hits_for_same_usable_inventory(self):
+        strategy = vm.CachedStrategy(vm.OptimalStrategy(self.coins_desc))
+
+        first = strategy.make_change(6, {"FOUR" : 5, "THREE" : 5, "ONE" : 6})
+        second = strategy.make_change(6, {"FOUR" : 9, "THREE" : 2, "ONE" : 7})
+
+        self.assertEqual({"THREE" : 2}, first)
+        self.assertIs(first, second)
+        self.assertEqual(vm.CacheInfo(1, 1, 0, 1, 1024), strategy.cache_info())
+
+    def test_cached_strategy_misses_when_usable_inventory_changes(self):
+        strategy = vm.CachedStrategy(vm.OptimalStrategy(self.coins_desc))
+
+        self.assertEqual({"THREE" : 2}, strategy.make_change(6, {"FOUR" : 1, "THREE" : 2, "ONE" : 2}))
+        self.assertEqual({"FOUR" : 1, "ONE" : 2}, strategy.make_change(6, {"FOUR" : 1, "THREE" : 1, "ONE" : 2}))
+        self.assertIsNone(strategy.make_change(6, {"FOUR" : 0, "THREE" : 1, "ONE" : 2}))
+        self.assertEqual(3, strategy.cache_info().misses)
+
+    def test_cached_strategy_evicts_least_recently_used(self):
+        strategy = vm.CachedStrategy(vm.OptimalStrategy(self.coins_desc), maxsize=2)
+        inventory = {"FOUR" : 5, "THREE" : 5, "ONE" : 5}
+
+        strategy.make_change(1, inventory)
+        strategy.make_change(3, inventory)
+        strategy.make_change(1, inventory)
+        strategy.make_change(4, inventory)
+        strategy.make_change(1, inventory)
+        strategy.make_change(3, inventory)
+
+        self.assertEqual(vm.CacheInfo(2, 4, 2, 2, 2), strategy.cache_info())
+
+        strategy.cache_clear()
+        self.assertEqual(vm.CacheInfo(0, 0, 0, 0, 2), strategy.cache_info())
+
+    def test_make_change_with_foreign_coins(self):
+        machine = ForeignCoinVendingMachine()
+        machine.coin_inventory["FOUR"] = 1
+        machine.coin_inventory["THREE"] = 2
+
+        self.assertTrue(machine.make_change(6))
+        self.assertEqual({"THREE" : 2}, machine.coin_return)
+        self.assertEqual(1, machine.coin_inventory["FOUR"])
+        self.assertEqual(0, machine.coin_inventory["THREE"])
+
 if __name__ == '__main__':
     unittest.main()